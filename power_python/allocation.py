@@ -0,0 +1,117 @@
+from typing import Dict, List, Sequence
+
+from .power_consumer import PowerConsumer
+
+
+class AllocationPolicy():
+    """Base class for the ways a `PowerSource` splits its output among its consumers."""
+    def allocate(self, power: int, demands: Sequence[int],
+                 consumers: Sequence[PowerConsumer]) -> List[int]:
+        """Split the available power among the consumers.
+
+        Args:
+            power: Amount of watts available for this second.
+            demands: Input of each consumer, in connection order.
+            consumers: The connected consumers, in connection order.
+
+        Returns:
+            List[int]: Watts handed to each consumer, never above its demand.
+
+        Raises:
+            NotImplementedError: This method is meant to be implemented by derived classes.
+        """
+        raise NotImplementedError()
+
+
+class Greedy(AllocationPolicy):
+    """First come, first served: consumers take their whole input in connection order."""
+    def allocate(self, power: int, demands: Sequence[int],
+                 consumers: Sequence[PowerConsumer]) -> List[int]:
+        allocation = []
+        for demand in demands:
+            supply = min(power, demand)
+            allocation.append(supply)
+            power -= supply
+        return allocation
+
+
+class Proportional(AllocationPolicy):
+    """Every consumer gets the same fraction of its input.
+
+    Watts lost to rounding go to the consumers with the largest remainders, earlier connections
+    first.
+    """
+    def allocate(self, power: int, demands: Sequence[int],
+                 consumers: Sequence[PowerConsumer]) -> List[int]:
+        total = sum(demands)
+        if total <= power:
+            return list(demands)
+        allocation = [demand * power // total for demand in demands]
+        leftover = power - sum(allocation)
+        if leftover:
+            remainders = sorted(range(len(demands)), key=lambda i: -(demands[i] * power % total))
+            for index in remainders[:leftover]:
+                allocation[index] += 1
+        return allocation
+
+
+class MaxMinFair(AllocationPolicy):
+    """Water-filling: the smallest demands are covered first, the rest share a common level.
+
+    Watts that can't be split evenly go to earlier connections first.
+    """
+    def allocate(self, power: int, demands: Sequence[int],
+                 consumers: Sequence[PowerConsumer]) -> List[int]:
+        if sum(demands) <= power:
+            return list(demands)
+        order = sorted(range(len(demands)), key=demands.__getitem__)
+        allocation = list(demands)
+        for position, index in enumerate(order):
+            pending = len(order) - position
+            if demands[index] * pending > power:
+                level, extra = divmod(power, pending)
+                capped = sorted(order[position:])
+                for rank, capped_index in enumerate(capped):
+                    allocation[capped_index] = level + (rank < extra)
+                break
+            power -= demands[index]
+        return allocation
+
+
+class Priority(AllocationPolicy):
+    """Consumers are served by priority class, highest first.
+
+    Classes are served greedily one after the other; the class where the power runs out shares
+    it through another policy, proportionally by default.
+    """
+    def __init__(self, priorities: Dict[PowerConsumer, int],
+                 within: AllocationPolicy = Proportional()):
+        """Initialize the `Priority` policy.
+
+        Args:
+            priorities: Priority class of each consumer. Consumers not listed belong to class 0.
+            within: Policy used to split the power inside the class where it runs out.
+        """
+        self._priorities = priorities
+        self._within = within
+
+    def allocate(self, power: int, demands: Sequence[int],
+                 consumers: Sequence[PowerConsumer]) -> List[int]:
+        classes = {}
+        for index, consumer in enumerate(consumers):
+            classes.setdefault(self._priorities.get(consumer, 0), []).append(index)
+        allocation = [0] * len(demands)
+        for priority in sorted(classes, reverse=True):
+            members = classes[priority]
+            wanted = sum(demands[index] for index in members)
+            if wanted <= power:
+                for index in members:
+                    allocation[index] = demands[index]
+                power -= wanted
+                continue
+            shares = self._within.allocate(power, [demands[index] for index in members],
+                                           [consumers[index] for index in members])
+            for index, share in zip(members, shares):
+                allocation[index] = share
+            break
+        return allocation
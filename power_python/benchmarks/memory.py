@@ -0,0 +1,57 @@
+"""Reports how many bytes each kind of power object takes.
+
+Run it with `python -m power_python.benchmarks.memory [COUNT]`.
+"""
+import sys
+import tracemalloc
+
+from ..power_bank import PowerBank
+from ..power_consumer import PowerConsumer
+from ..power_source import PowerSource
+
+
+class Load(PowerConsumer):
+    """Minimal concrete consumer, as leaf devices are usually modeled."""
+    __slots__ = ()
+
+    def receive_power(self, watt_amount: int) -> int:
+        return int(watt_amount / self.input() * 100.0)
+
+
+DEVICES = {
+    'PowerConsumer': lambda: Load(100),
+    'PowerSource': lambda: PowerSource(100),
+    'PowerBank': lambda: PowerBank(100, 100, 1000),
+}
+
+
+def bytes_per_device(factory, count: int) -> float:
+    """Measure the memory taken by `count` objects built by `factory`.
+
+    Args:
+        factory: Callable building one device.
+        count: Amount of devices to build.
+
+    Returns:
+        float: Average amount of bytes allocated per device.
+    """
+    devices = [None] * count
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        for i in range(count):
+            devices[i] = factory()
+        return (tracemalloc.get_traced_memory()[0] - before) / count
+    finally:
+        tracemalloc.stop()
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    count = int(argv[0]) if argv else 100000
+    for name, factory in DEVICES.items():
+        print(f'{name:<16}{bytes_per_device(factory, count):>10.1f} bytes')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,223 @@
+"""Performance benchmarks for the power package.
+
+Run it with `python -m power_python.benchmarks.suite`. Every scenario reports its throughput,
+the memory blocks left allocated and the peak traced memory as JSON. When a baseline file is
+given, the results are compared against it and the exit code is 1 if any scenario got slower
+than the allowed tolerance.
+"""
+import argparse
+import gc
+import json
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Tuple
+
+from ..allocation import AllocationPolicy, Greedy, MaxMinFair, Priority, Proportional
+from ..grid_engine import GridEngine
+from ..power_bank import PowerBank
+from ..power_load import PowerLoad
+from ..power_source import PowerSource
+from .memory import Load
+
+
+def fanout(scale: float) -> Tuple[Callable[[], None], int]:
+    """One source feeding 100k consumers, only partially covering their demand."""
+    source = PowerSource(50000)
+    source.connect_many(Load(10) for _ in range(int(100000 * scale)))
+    ticks = 20
+
+    def run():
+        for _ in range(ticks):
+            source.supply_power()
+    return run, ticks
+
+
+def fanout_loads(scale: float) -> Tuple[Callable[[], None], int]:
+    """Same grid as `fanout`, with plain `PowerLoad`s the source doesn't have to call."""
+    source = PowerSource(50000)
+    source.connect_many(PowerLoad(10) for _ in range(int(100000 * scale)))
+    ticks = 10000
+
+    def run():
+        for _ in range(ticks):
+            source.supply_power()
+    return run, ticks
+
+
+def fanout_policy(policy: Callable[[List[Load]], AllocationPolicy]
+                  ) -> Callable[[float], Tuple[Callable[[], None], int]]:
+    """Build a grid like `fanout`'s with uneven loads, split through an allocation policy."""
+    def scenario(scale: float) -> Tuple[Callable[[], None], int]:
+        loads = [Load(10 + i % 7) for i in range(int(100000 * scale))]
+        source = PowerSource(50000)
+        source.connect_many(loads)
+        source.set_policy(policy(loads))
+        ticks = 20
+
+        def run():
+            for _ in range(ticks):
+                source.supply_power()
+        return run, ticks
+    return scenario
+
+
+def fanout_engine(scale: float) -> Tuple[Callable[[], None], int]:
+    """Same grid as `fanout`, simulated through `GridEngine`."""
+    source = PowerSource(50000)
+    source.connect_many(Load(10) for _ in range(int(100000 * scale)))
+    engine = GridEngine([source])
+    ticks = 10000
+    return lambda: engine.run(ticks), ticks
+
+
+def bank_chain(scale: float) -> Tuple[Callable[[], None], int]:
+    """A source feeding a chain of 1000 banks, each one feeding the next."""
+    sources = [PowerSource(200)]
+    for _ in range(int(1000 * scale)):
+        bank = PowerBank(100, 100, 10000)
+        sources[-1].connect(bank)
+        sources[-1].connect(Load(50))
+        sources.append(bank)
+    ticks = 100
+
+    def run():
+        for _ in range(ticks):
+            for source in sources:
+                source.supply_power()
+    return run, ticks
+
+
+def small_grid(scale: float) -> Tuple[Callable[[], None], int]:
+    """A handful of objects ticked a million times."""
+    source = PowerSource(300)
+    bank = PowerBank(150, 100, 5000)
+    other = PowerBank(50, 50, 1000)
+    source.connect_many([bank, Load(80), Load(40)])
+    bank.connect_many([other, Load(30)])
+    other.connect(Load(20))
+    sources = [source, bank, other]
+    ticks = int(1000000 * scale)
+
+    def run():
+        for _ in range(ticks):
+            for source in sources:
+                source.supply_power()
+    return run, ticks
+
+
+def connect_heavy(scale: float) -> Tuple[Callable[[], None], int]:
+    """Wiring 200k consumers into a single source, one call at a time."""
+    consumers = [Load(10) for _ in range(int(200000 * scale))]
+
+    def run():
+        source = PowerSource(100)
+        for consumer in consumers:
+            source.connect(consumer)
+    return run, len(consumers)
+
+
+SCENARIOS = {
+    'fanout': fanout,
+    'fanout_loads': fanout_loads,
+    'fanout_greedy': fanout_policy(lambda loads: Greedy()),
+    'fanout_proportional': fanout_policy(lambda loads: Proportional()),
+    'fanout_priority': fanout_policy(
+        lambda loads: Priority({load: i % 3 for i, load in enumerate(loads)})),
+    'fanout_max_min_fair': fanout_policy(lambda loads: MaxMinFair()),
+    'fanout_engine': fanout_engine,
+    'bank_chain': bank_chain,
+    'small_grid': small_grid,
+    'connect_heavy': connect_heavy,
+}
+
+
+def measure(scenario: Callable[[float], Tuple[Callable[[], None], int]],
+            scale: float) -> Dict[str, float]:
+    """Run one scenario, first timed and then traced.
+
+    Args:
+        scenario: Callable building the scenario, returning the function running it and the
+            amount of operations it performs.
+        scale: Factor applied to the size of the scenario.
+
+    Returns:
+        Dict[str, float]: Operations per second, memory blocks left allocated and peak traced
+            memory in bytes.
+    """
+    run, operations = scenario(scale)
+    gc.collect()
+    start = time.perf_counter()
+    run()
+    elapsed = time.perf_counter() - start
+
+    run, _ = scenario(scale)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        blocks = sys.getallocatedblocks()
+        run()
+        blocks = sys.getallocatedblocks() - blocks
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {'ops_per_second': operations / elapsed, 'allocated_blocks': blocks,
+            'peak_bytes': peak}
+
+
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]],
+            tolerance: float) -> Dict[str, Dict[str, float]]:
+    """Compare the throughput of each scenario against a baseline.
+
+    Args:
+        results: Metrics measured for each scenario.
+        baseline: Metrics stored from a previous run.
+        tolerance: Allowed slowdown, as a fraction of the baseline throughput.
+
+    Returns:
+        Dict[str, Dict[str, float]]: For each scenario present in both, the ratio between the
+            current and the baseline throughput and whether it counts as a regression.
+    """
+    comparison = {}
+    for name, metrics in results.items():
+        if name in baseline:
+            ratio = metrics['ops_per_second'] / baseline[name]['ops_per_second']
+            comparison[name] = {'ratio': ratio, 'regression': ratio < 1 - tolerance}
+    return comparison
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('scenarios', nargs='*', metavar='SCENARIO',
+                        help=f'Scenarios to run, out of {", ".join(SCENARIOS)}. Defaults to all.')
+    parser.add_argument('--scale', type=float, default=1.0, help='Size factor for scenarios.')
+    parser.add_argument('--baseline', help='JSON file with the results to compare against.')
+    parser.add_argument('--save', help='JSON file to store the results in.')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='Allowed slowdown against the baseline.')
+    args = parser.parse_args(argv)
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f'unknown scenarios: {", ".join(sorted(unknown))}')
+
+    results = {name: measure(SCENARIOS[name], args.scale)
+               for name in args.scenarios or SCENARIOS}
+    report = {'scale': args.scale, 'results': results}
+    if args.save:
+        with open(args.save, 'w') as file:
+            json.dump(report, file, indent=2)
+    status = 0
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+        if baseline['scale'] != args.scale:
+            parser.error(f'the baseline was measured with scale {baseline["scale"]}')
+        report['comparison'] = compare(results, baseline['results'], args.tolerance)
+        status = int(any(entry['regression'] for entry in report['comparison'].values()))
+    json.dump(report, sys.stdout, indent=2)
+    print()
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
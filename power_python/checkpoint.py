@@ -0,0 +1,124 @@
+import mmap
+import os
+import struct
+from array import array
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Iterable, NamedTuple
+
+from .grid_engine import reachable
+from .power_bank import PowerBank
+from .power_source import PowerSource
+from .scenario import BANK, Scenario, _columns, _read_binary, _write_binary
+
+MAGIC = b'PWRCKPT1'
+HEADER = struct.Struct('<8sq')
+
+
+class Checkpoint(NamedTuple):
+    """A grid restored from a checkpoint.
+
+    Attributes:
+        scenario: The objects of the grid and the sources to supply.
+        tick: Amount of seconds that had been simulated when the checkpoint was taken.
+    """
+    scenario: Scenario
+    tick: int
+
+
+class Checkpointer():
+    """Periodically persists the state of a grid while it's being simulated.
+
+    The layout of the grid is flattened once, so taking a checkpoint on the simulation thread
+    only copies the bank charges; the file is written from a background thread. Call
+    `refresh()` after changing connections or parameters so later checkpoints pick them up.
+    """
+    def __init__(self, sources: Iterable[PowerSource], path: str, every: int, tick: int = 0):
+        """Initialize the `Checkpointer`.
+
+        Args:
+            sources: The power sources supplied on every tick, in order.
+            path: File holding the latest checkpoint. It's replaced atomically on every write.
+            every: Amount of ticks between checkpoints.
+            tick: Amount of seconds already simulated, such as the tick of a restored checkpoint.
+
+        Raises:
+            ValueError: If the grid holds objects a scenario can't describe.
+        """
+        self._sources = list(sources)
+        self._path = path
+        self._every = every
+        self._tick = tick
+        self._writer = ThreadPoolExecutor(max_workers=1)
+        self._pending = None
+        self.refresh()
+
+    def refresh(self):
+        """Flatten the layout of the grid again, after its topology or parameters changed.
+
+        Raises:
+            ValueError: If the grid holds objects a scenario can't describe, which couldn't be
+                restored as they are.
+        """
+        self._columns = _columns(self._sources, check=True)
+        self._banks = [node for node in reachable(self._sources) if isinstance(node, PowerBank)]
+
+    def record(self):
+        """Account for one simulated tick, taking a checkpoint if it's due."""
+        self._tick += 1
+        if self._tick % self._every == 0:
+            self.save()
+
+    def save(self) -> Future:
+        """Take a checkpoint now, writing it in the background.
+
+        Returns:
+            Future: Completes once the checkpoint is on disk.
+        """
+        charges = array('q', [bank._stored_power for bank in self._banks])
+        self._pending = self._writer.submit(self._write, self._columns, charges, self._tick)
+        return self._pending
+
+    def _write(self, columns, charges: array, tick: int):
+        """Write a checkpoint file from the flattened layout and the copied charges."""
+        stored = array('q', bytes(8 * len(columns['kind'])))
+        banks = (position for position, kind in enumerate(columns['kind']) if kind == BANK)
+        for position, charge in zip(banks, charges):
+            stored[position] = charge
+        temporary = self._path + '.tmp'
+        with open(temporary, 'wb') as file:
+            file.write(HEADER.pack(MAGIC, tick))
+            _write_binary(file, dict(columns, stored=stored))
+        os.replace(temporary, self._path)
+
+    def close(self, wait: bool = True):
+        """Stop the background writer.
+
+        Args:
+            wait: Whether to wait for the pending checkpoint to be written.
+        """
+        self._writer.shutdown(wait=wait)
+        if wait and self._pending is not None:
+            self._pending.result()
+
+
+def restore(path: str) -> Checkpoint:
+    """Rebuild a grid from a checkpoint file.
+
+    Args:
+        path: File written by a `Checkpointer`.
+
+    Returns:
+        Checkpoint: The restored grid and the tick it was taken at.
+
+    Raises:
+        ValueError: If the file isn't a checkpoint.
+    """
+    with open(path, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        magic, tick = HEADER.unpack_from(data)
+        if magic != MAGIC:
+            raise ValueError(f'{path} is not a checkpoint')
+        view = memoryview(data)[HEADER.size:]
+        try:
+            return Checkpoint(_read_binary(view), tick)
+        finally:
+            view.release()
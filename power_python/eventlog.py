@@ -0,0 +1,483 @@
+import io
+import mmap
+import struct
+from bisect import bisect_right
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from .grid_engine import reachable
+from .power_bank import PowerBank
+from .power_consumer import PowerConsumer
+from .power_load import PowerLoad
+from .power_source import PowerSource
+from .scenario import (CONSUMER, SOURCE, _TYPES, Scenario, _check, _columns, _read_binary,
+                       _write_binary)
+
+MAGIC = b'PWRLOG01'
+
+# Record types, stored in the first byte of every record.
+TICKS = 1
+CONNECT = 2
+DISCONNECT = 3
+ADD = 4
+SET = 5
+ADD_SOURCE = 6
+SNAPSHOT = 7
+
+RECORDS = {
+    # Amount of consecutive ticks.
+    TICKS: struct.Struct('<Bq'),
+    # Source and consumer ids.
+    CONNECT: struct.Struct('<Bqq'),
+    DISCONNECT: struct.Struct('<Bqq'),
+    # Kind, input, output, capacity and charge of a node, which gets the next id.
+    ADD: struct.Struct('<Bqqqqq'),
+    # Node id, field and value.
+    SET: struct.Struct('<BqBq'),
+    # Id of a source appended to the ones supplied on every tick.
+    ADD_SOURCE: struct.Struct('<Bq'),
+    # Tick and size of the columnar scenario that follows the record.
+    SNAPSHOT: struct.Struct('<Bqq'),
+}
+
+# Fields changed by `SET` records.
+INPUT = 0
+OUTPUT = 1
+CAPACITY = 2
+STORED = 3
+
+
+def _feeders(nodes: List[PowerConsumer]) -> Dict[int, Set[int]]:
+    """Positions of the sources feeding each node, by the position of the node."""
+    ids = {id(node): index for index, node in enumerate(nodes)}
+    feeders = {}
+    for index, node in enumerate(nodes):
+        if isinstance(node, PowerSource):
+            for consumer in node._connections:
+                feeders.setdefault(ids[id(consumer)], set()).add(index)
+    return feeders
+
+
+def _apply(nodes: List[PowerConsumer], sources: List[PowerSource],
+           feeders: Dict[int, Set[int]], kind: int, values: Tuple[int, ...]) -> bool:
+    """Carry out a change recorded in the log, on the nodes identified by their position.
+
+    `feeders` is kept up to date with the connections the change makes or breaks.
+    """
+    if kind == CONNECT:
+        changed = nodes[values[0]].connect(nodes[values[1]])
+        if changed:
+            feeders.setdefault(values[1], set()).add(values[0])
+        return changed
+    if kind == DISCONNECT:
+        changed = nodes[values[0]].disconnect(nodes[values[1]])
+        if changed:
+            feeders[values[1]].discard(values[0])
+        return changed
+    if kind == ADD_SOURCE:
+        sources.append(nodes[values[0]])
+        return True
+    node, field, value = nodes[values[0]], values[1], values[2]
+    if field == INPUT:
+        node._input = value
+        # The cumulative demand kept by the feeders no longer holds.
+        for position in feeders.get(values[0], ()):
+            feeder = nodes[position]
+            if feeder._index is not None:
+                feeder._drop_index()
+    elif field == OUTPUT:
+        node._output = value
+    elif field == CAPACITY:
+        node._capacity = value
+        node._store(node._stored_power)
+    else:
+        node._store(value)
+    return True
+
+
+class EventLog():
+    """Append-only binary log of everything done to a grid while it's simulated.
+
+    Changes and ticks go through the log, which carries them out and appends a fixed-size record
+    for each, so `Replay` can re-execute them in the same order. Consecutive ticks share a single
+    record, so logging a tick only bumps a counter. Every `every` ticks the whole state of the
+    grid is embedded as a columnar scenario, letting replays start from there instead of from
+    the beginning.
+
+    Only loads, sources and banks using the default greedy allocation can be logged, the same
+    objects scenario files hold. Changes made to the grid without going through the log aren't
+    recorded.
+    """
+    def __init__(self, path: str, sources: Iterable[PowerSource], every: int = 1000):
+        """Initialize the `EventLog`, writing the initial state of the grid.
+
+        Args:
+            path: File to write. It's overwritten if it exists.
+            sources: The power sources supplied on every tick, in order.
+            every: Amount of ticks between embedded snapshots.
+
+        Raises:
+            ValueError: If the grid holds objects that can't be replayed.
+        """
+        self._sources = list(sources)
+        self._nodes = reachable(self._sources)
+        for node in self._nodes:
+            _check(node)
+        self._ids = {id(node): index for index, node in enumerate(self._nodes)}
+        self._feeders = _feeders(self._nodes)
+        self._every = every
+        self._tick = 0
+        self._pending = 0
+        self._file = open(path, 'wb', buffering=1 << 16)
+        self._file.write(MAGIC)
+        self._snapshot()
+
+    def _write(self, kind: int, *values: int):
+        """Append a record, after the ticks that came before it."""
+        if self._pending:
+            self._file.write(RECORDS[TICKS].pack(TICKS, self._pending))
+            self._pending = 0
+        self._file.write(RECORDS[kind].pack(kind, *values))
+
+    def _snapshot(self):
+        """Embed the current state of the whole grid."""
+        payload = io.BytesIO()
+        _write_binary(payload, _columns(self._sources, self._nodes))
+        self._write(SNAPSHOT, self._tick, payload.tell())
+        self._file.write(payload.getbuffer())
+
+    def _id(self, node: PowerConsumer) -> int:
+        """Id of a node in the log, adding it first if it's new."""
+        self.add(node)
+        return self._ids[id(node)]
+
+    def ticks(self) -> int:
+        """Getter for the amount of ticks logged so far.
+
+        Returns:
+            int: Number of seconds simulated through this log.
+        """
+        return self._tick
+
+    def add(self, node: PowerConsumer) -> bool:
+        """Start logging an object, along with the ones it feeds.
+
+        Connecting an object through the log adds it on its own, so this is only needed to have
+        an unconnected object in the replays.
+
+        Args:
+            node: The object to add.
+
+        Returns:
+            bool: `True` if it was added, `False` if it was already logged.
+
+        Raises:
+            ValueError: If the object, or one it feeds, can't be replayed.
+        """
+        if id(node) in self._ids:
+            return False
+        new = [other for other in (reachable([node]) if isinstance(node, PowerSource) else [node])
+               if id(other) not in self._ids]
+        for other in new:
+            _check(other)
+        for other in new:
+            bank = isinstance(other, PowerBank)
+            self._ids[id(other)] = len(self._nodes)
+            self._nodes.append(other)
+            self._write(ADD, _TYPES[type(other)],
+                        other.input() if isinstance(other, PowerConsumer) else 0,
+                        other.max_output() if bank else
+                        other.output() if isinstance(other, PowerSource) else 0,
+                        other.capacity() if bank else 0, other.stored_power() if bank else 0)
+        for other in new:
+            if isinstance(other, PowerSource):
+                for consumer in other._connections:
+                    self._feeders.setdefault(self._ids[id(consumer)], set()).add(
+                        self._ids[id(other)])
+                    self._write(CONNECT, self._ids[id(other)], self._ids[id(consumer)])
+        return True
+
+    def add_source(self, source: PowerSource):
+        """Start supplying another source on every tick, after the current ones.
+
+        Args:
+            source: The source to supply.
+        """
+        self._log(ADD_SOURCE, self._id(source))
+
+    def connect(self, source: PowerSource, consumer: PowerConsumer) -> bool:
+        """Connect a consumer to a source and log it.
+
+        Args:
+            source: The supplier.
+            consumer: The object that will start consuming from `source`.
+
+        Returns:
+            bool: What `source.connect()` returned.
+        """
+        return self._log(CONNECT, self._id(source), self._id(consumer))
+
+    def disconnect(self, source: PowerSource, consumer: PowerConsumer) -> bool:
+        """Disconnect a consumer from a source and log it.
+
+        Args:
+            source: The supplier.
+            consumer: The object that will stop consuming from `source`.
+
+        Returns:
+            bool: What `source.disconnect()` returned.
+        """
+        return self._log(DISCONNECT, self._id(source), self._id(consumer))
+
+    def set_input(self, consumer: PowerConsumer, power_input: int):
+        """Change the power intake of a consumer and log it.
+
+        Args:
+            consumer: A load or bank.
+            power_input: New requirement of power, in watts per second.
+        """
+        self._log(SET, self._id(consumer), INPUT, power_input)
+
+    def set_output(self, source: PowerSource, power_output: int):
+        """Change the output of a source, or the maximum output of a bank, and log it.
+
+        Args:
+            source: A source or bank.
+            power_output: New output, in watts per second.
+        """
+        self._log(SET, self._id(source), OUTPUT, power_output)
+
+    def set_capacity(self, bank: PowerBank, capacity: int):
+        """Change the capacity of a bank and log it.
+
+        Args:
+            bank: The bank to change.
+            capacity: New storage capacity, in Joules.
+        """
+        self._log(SET, self._id(bank), CAPACITY, capacity)
+
+    def set_charge(self, bank: PowerBank, charge: int):
+        """Change the energy stored in a bank and log it.
+
+        Args:
+            bank: The bank to change.
+            charge: New stored energy, in Joules.
+        """
+        self._log(SET, self._id(bank), STORED, charge)
+
+    def _log(self, kind: int, *values: int) -> bool:
+        """Carry out a change, logging it if it changed anything."""
+        changed = _apply(self._nodes, self._sources, self._feeders, kind, values)
+        if changed:
+            self._write(kind, *values)
+        return changed
+
+    def tick(self) -> List[int]:
+        """Supply every source once, in order, and log it.
+
+        Returns:
+            List[int]: Power remaining on each source after supplying its consumers.
+        """
+        remaining = [source.supply_power() for source in self._sources]
+        self._pending += 1
+        self._tick += 1
+        if self._tick % self._every == 0:
+            self._snapshot()
+        return remaining
+
+    def flush(self):
+        """Write everything logged so far to the file."""
+        if self._pending:
+            self._file.write(RECORDS[TICKS].pack(TICKS, self._pending))
+            self._pending = 0
+        self._file.flush()
+
+    def close(self):
+        """Write everything logged so far and close the file."""
+        self.flush()
+        self._file.close()
+
+
+class Replay():
+    """Re-executes a grid run written by an `EventLog`, as fast as it can be simulated.
+
+    The log is read in place and the grid is rebuilt from the snapshot embedded closest before
+    the requested tick, so seeking doesn't replay the whole run. Efficiency counters only cover
+    the ticks replayed since the last rebuild. A record cut short at the end of the log, as left
+    by an interrupted run, is ignored.
+    """
+    def __init__(self, path: str):
+        """Open a log, indexing its snapshots.
+
+        Args:
+            path: File written by an `EventLog`.
+
+        Raises:
+            ValueError: If the file isn't an event log.
+        """
+        self._file = open(path, 'rb')
+        self._data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._data[:len(MAGIC)] != MAGIC:
+            self.close()
+            raise ValueError(f'{path} is not an event log')
+        # Tick and offset of every snapshot.
+        self._snapshots = []
+        ticks = 0
+        offset = len(MAGIC)
+        while offset < len(self._data):
+            kind = self._data[offset]
+            record = RECORDS[kind]
+            if offset + record.size > len(self._data):
+                break
+            values = record.unpack_from(self._data, offset)
+            end = offset + record.size
+            if kind == TICKS:
+                ticks += values[1]
+            elif kind == SNAPSHOT:
+                end += values[2]
+                if end > len(self._data):
+                    break
+                self._snapshots.append((values[1], offset))
+            offset = end
+        self._end = offset
+        self._ticks = ticks
+        self._nodes = None
+        self._sources = None
+        self._feeders = None
+        self._tick = 0
+        self._offset = 0
+        # Ticks of the current `TICKS` record that haven't been replayed yet.
+        self._left = 0
+        # Whether changes logged after the current tick were already replayed.
+        self._changed = False
+
+    def ticks(self) -> int:
+        """Getter for the amount of ticks in the log.
+
+        Returns:
+            int: Number of seconds the logged run simulated.
+        """
+        return self._ticks
+
+    def snapshots(self) -> List[int]:
+        """Getter for the ticks the embedded snapshots were taken at.
+
+        Returns:
+            List[int]: Ticks that can be reached without replaying a single one.
+        """
+        return [tick for tick, _ in self._snapshots]
+
+    def tick(self) -> int:
+        """Getter for the tick the replayed grid is at.
+
+        Returns:
+            int: Amount of logged ticks replayed so far.
+        """
+        return self._tick
+
+    def grid(self) -> Scenario:
+        """Getter for the replayed grid, loading the initial state if nothing was replayed yet.
+
+        Returns:
+            Scenario: Every logged object, in the order they were added, and the sources supplied
+                on every tick. Seeking back to before the current tick rebuilds the objects.
+        """
+        if self._nodes is None:
+            self.seek(0)
+        return Scenario(self._nodes, self._sources)
+
+    def seek(self, tick: int) -> Scenario:
+        """Bring the grid to the state it had right after a tick, before the changes that followed.
+
+        Args:
+            tick: Amount of logged ticks to have replayed. 0 gives the initial grid.
+
+        Returns:
+            Scenario: The replayed grid.
+
+        Raises:
+            ValueError: If the log doesn't reach that tick.
+        """
+        if not 0 <= tick <= self._ticks:
+            raise ValueError(f'tick {tick} is not in the log')
+        snapshot_tick, offset = self._snapshots[bisect_right(self._snapshots, (tick, self._end))
+                                                - 1]
+        # Going on from the current state is fine unless it's past the tick, or the snapshot is
+        # closer.
+        if self._nodes is None or not snapshot_tick <= self._tick <= tick or \
+                (self._tick == tick and self._changed):
+            self._load(offset)
+        self._advance(tick)
+        return Scenario(self._nodes, self._sources)
+
+    def run(self) -> Scenario:
+        """Replay the whole log, including the changes made after the last tick.
+
+        Returns:
+            Scenario: The grid as the logged run left it.
+        """
+        if self._nodes is None:
+            self._load(self._snapshots[-1][1])
+        self._advance(None)
+        return Scenario(self._nodes, self._sources)
+
+    def _load(self, offset: int):
+        """Rebuild the grid from the snapshot whose record starts at the given offset."""
+        record = RECORDS[SNAPSHOT]
+        _, tick, size = record.unpack_from(self._data, offset)
+        start = offset + record.size
+        view = memoryview(self._data)[start:start + size]
+        try:
+            self._nodes, self._sources = _read_binary(view)
+        finally:
+            view.release()
+        self._feeders = _feeders(self._nodes)
+        self._tick = tick
+        self._offset = start + size
+        self._left = 0
+        self._changed = False
+
+    def _advance(self, tick: Optional[int]):
+        """Replay records until the given tick is reached, or until the end of the log."""
+        data = self._data
+        while True:
+            if self._left:
+                steps = self._left if tick is None else min(self._left, tick - self._tick)
+                if not steps:
+                    return
+                sources = self._sources
+                for _ in range(steps):
+                    for source in sources:
+                        source.supply_power()
+                self._left -= steps
+                self._tick += steps
+                self._changed = False
+                continue
+            if tick is not None and self._tick >= tick or self._offset >= self._end:
+                return
+            kind = data[self._offset]
+            record = RECORDS[kind]
+            values = record.unpack_from(data, self._offset)
+            self._offset += record.size
+            if kind == TICKS:
+                self._left = values[1]
+            elif kind == SNAPSHOT:
+                self._offset += values[2]
+            elif kind == ADD:
+                self._changed = True
+                _, node_kind, power_input, power_output, capacity, stored = values
+                if node_kind == CONSUMER:
+                    node = PowerLoad(power_input)
+                elif node_kind == SOURCE:
+                    node = PowerSource(power_output)
+                else:
+                    node = PowerBank(power_input, power_output, capacity)
+                    node._stored_power = stored
+                self._nodes.append(node)
+            else:
+                self._changed = True
+                _apply(self._nodes, self._sources, self._feeders, kind, values[1:])
+
+    def close(self):
+        """Release the log file. The replayed objects remain usable."""
+        self._data.close()
+        self._file.close()
@@ -0,0 +1,304 @@
+import heapq
+from itertools import count
+from typing import Callable, Iterable, List, Optional, Sequence, Tuple
+
+from .grid_engine import _reject_groups, reachable
+from .power_bank import PowerBank
+from .power_source import PowerSource
+
+
+class EventSimulator():
+    """Simulator that jumps over the seconds in which nothing changes on the grid.
+
+    Each step supplies every source once, exactly as `supply_power()` would, and measures how
+    much each bank's charge moved. Since the same flows repeat for as long as no bank crosses a
+    point that changes the outcome of a tick (becoming full, running empty or dropping under its
+    maximum output), the simulator works out when the first crossing or scheduled change happens
+    and jumps straight there. Consumers that aren't a `PowerBank` only get their
+    `receive_power()` called on the seconds that are actually stepped through.
+    """
+    def __init__(self, sources: Iterable[PowerSource], record: bool = False):
+        """Initialize the `EventSimulator`.
+
+        Args:
+            sources: The power sources supplied on every tick, in the order they'll be supplied.
+            record: Whether to keep what's needed to report per-second charges afterwards.
+
+        Raises:
+            ValueError: If the grid holds a `SubGrid`, whose banks couldn't be jumped forward.
+        """
+        self._sources = list(sources)
+        self._record = record
+        self._segments = []
+        self._events = []
+        self._sequence = count()
+        self._tick = 0
+        self._steps = 0
+        self._update()
+
+    def _update(self):
+        """Refresh the banks of the grid after its topology might have changed."""
+        nodes = reachable(self._sources)
+        _reject_groups(nodes)
+        self._banks = [node for node in nodes if isinstance(node, PowerBank)]
+        positions = {}
+        feeders = {}
+        self._connected = []
+        for position, source in enumerate(self._sources):
+            positions.setdefault(id(source), []).append(position)
+            connected = []
+            demand = 0
+            for consumer in source._connections:
+                if isinstance(consumer, PowerBank):
+                    connected.append((consumer, demand))
+                    feeders.setdefault(id(consumer), []).append(position)
+                    if source.policy() is not None:
+                        # What it's offered can't be told from the greedy cumulative demand.
+                        feeders[id(consumer)].append(None)
+                demand += consumer.input()
+            self._connected.append(connected)
+        self._supplying = [id(bank) in positions for bank in self._banks]
+        # Banks supplied once per tick and only fed by greedy sources are offered the same power
+        # on every tick, so their charge follows a fixed map for as long as their output stays at
+        # its maximum, even while bouncing at full capacity. The feeders are split into the ones
+        # ticking before the bank and the ones ticking after it.
+        self._feeders = []
+        for bank in self._banks:
+            own = positions.get(id(bank), ())
+            fed = feeders.get(id(bank), ())
+            if len(own) != 1 or not fed or None in fed:
+                self._feeders.append(None)
+            else:
+                self._feeders.append(([position for position in fed if position < own[0]],
+                                      [position for position in fed if position > own[0]]))
+
+    def tick(self) -> int:
+        """Getter for the current simulation time.
+
+        Returns:
+            int: Amount of seconds simulated so far.
+        """
+        return self._tick
+
+    def steps(self) -> int:
+        """Getter for the amount of seconds that were actually stepped through.
+
+        Returns:
+            int: Amount of exact ticks computed, the rest of the seconds were jumped over.
+        """
+        return self._steps
+
+    def schedule(self, tick: int, action: Callable[[], None]):
+        """Schedule a change on the grid, such as a load change or a new connection.
+
+        Args:
+            tick: Second at which the change happens, before the sources are supplied.
+            action: Callable performing the change.
+        """
+        heapq.heappush(self._events, (tick, next(self._sequence), action))
+
+    def run(self, seconds: int):
+        """Advance the grid by the given amount of seconds.
+
+        Args:
+            seconds: Amount of seconds to simulate.
+        """
+        end = self._tick + seconds
+        while self._tick < end:
+            changed = False
+            while self._events and self._events[0][0] <= self._tick:
+                heapq.heappop(self._events)[2]()
+                changed = True
+            if changed:
+                self._update()
+            limit = end
+            if self._events:
+                limit = min(limit, self._events[0][0])
+            self._step(limit - self._tick)
+
+    def _step(self, limit: int):
+        """Step through one second, then jump over as many of the following ones as possible."""
+        banks = self._banks
+        before = [bank._stored_power for bank in banks]
+        low = {id(bank): bank._stored_power for bank in banks}
+        high = dict(low)
+        offered = {}
+        drained = {}
+        for position, (source, connected) in enumerate(zip(self._sources, self._connected)):
+            charge = low.get(id(source))
+            power = 0 if charge is not None and source._stored_power <= 0 else source.output()
+            charge = source._stored_power if charge is not None else None
+            source.supply_power()
+            for bank, demand in connected:
+                offered[position, id(bank)] = min(max(power - demand, 0), bank.input())
+                low[id(bank)] = min(low[id(bank)], bank._stored_power)
+                high[id(bank)] = max(high[id(bank)], bank._stored_power)
+            if charge is not None:
+                drained[id(source)] = charge - source._stored_power
+                low[id(source)] = min(low[id(source)], source._stored_power)
+                high[id(source)] = max(high[id(source)], source._stored_power)
+        self._steps += 1
+
+        after = [bank._stored_power for bank in banks]
+        deltas = [now - then for now, then in zip(after, before)]
+        bouncing = {}
+        repeat = limit - 1
+        for index, (bank, supplying, delta) in enumerate(zip(banks, self._supplying, deltas)):
+            if not repeat:
+                break
+            lowest, highest = low[id(bank)], high[id(bank)]
+            if self._feeders[index] is not None:
+                early, late = ([offered[position, id(bank)] for position in positions]
+                               for positions in self._feeders[index])
+                drain = drained[id(bank)]
+                if sum(early) + sum(late) > drain and lowest >= max(bank.max_output(), 1) \
+                        and bank._capacity >= bank.max_output():
+                    bouncing[index] = (bank._capacity, early, drain, late)
+                    continue
+            if not delta:
+                continue
+            thresholds = [bank._capacity]
+            if supplying:
+                thresholds += [1, bank.max_output()]
+            for threshold in thresholds:
+                if lowest < threshold <= highest:
+                    repeat = 0
+                elif highest < threshold and delta > 0:
+                    repeat = min(repeat, (threshold - 1 - highest) // delta)
+                elif lowest >= threshold and delta < 0:
+                    repeat = min(repeat, (lowest - threshold) // -delta)
+            if supplying and lowest < bank.max_output():
+                repeat = 0
+        floors = {index: max(banks[index].max_output(), 1) for index in bouncing}
+        for index, path in bouncing.items():
+            if len(path[1]) + len(path[3]) > 1:
+                # The output must stay at its maximum all along, or the flows change.
+                seconds, _ = _orbit(banks[index]._stored_power, path, floors[index], repeat)
+                repeat = min(repeat, seconds)
+        for index, (bank, delta) in enumerate(zip(banks, deltas)):
+            if index not in bouncing:
+                bank._store(bank._stored_power + repeat * delta)
+                continue
+            capacity, early, drain, late = bouncing[index]
+            if len(early) + len(late) > 1:
+                bank._store(_orbit(bank._stored_power, bouncing[index], floors[index], repeat)[1])
+            elif early:
+                bank.advance(repeat, early[0])
+            elif repeat:
+                # Supplied before being fed: the same rotation, half a tick out of phase.
+                bank._store(bank._stored_power - drain)
+                bank.advance(repeat - 1, late[0])
+                if bank._stored_power < capacity:
+                    bank._store(bank._stored_power + late[0])
+
+        if self._record:
+            self._segments.append((self._tick, repeat + 1, banks, after, deltas, bouncing))
+        self._tick += repeat + 1
+
+    def charge_history(self, bank: PowerBank, start: int = 0,
+                       stop: Optional[int] = None) -> List[int]:
+        """Per-second charge of a bank, rebuilt from the recorded steps.
+
+        Args:
+            bank: A `PowerBank` of the grid.
+            start: First second to report.
+            stop: Second to stop at, not included. Defaults to the current simulation time.
+
+        Returns:
+            List[int]: Stored energy of `bank` at the end of each second in the range.
+
+        Raises:
+            ValueError: If the simulator wasn't created with `record` enabled.
+        """
+        if not self._record:
+            raise ValueError('The simulator is not recording its steps')
+        stop = self._tick if stop is None else stop
+        history = []
+        for first, length, banks, after, deltas, bouncing in self._segments:
+            if first + length <= start or first >= stop:
+                continue
+            index = next(i for i, node in enumerate(banks) if node is bank)
+            charge = after[index]
+            for tick in range(first, min(first + length, stop)):
+                if tick >= start:
+                    history.append(charge)
+                if index in bouncing:
+                    charge = _bounce(charge, *bouncing[index])
+                else:
+                    charge += deltas[index]
+        return history
+
+
+def _bounce(charge: int, capacity: int, before: Sequence[int], drain: int,
+            after: Sequence[int]) -> int:
+    """Charge of a bank after a second with the same offers and drain as the last one.
+
+    The bank takes the offers of the sources ticking before it, supplies its consumers and takes
+    the offers of the sources ticking after it. Each offer is only taken while it isn't full.
+    """
+    for inflow in before:
+        if charge < capacity:
+            charge += inflow
+    charge -= drain
+    for inflow in after:
+        if charge < capacity:
+            charge += inflow
+    return charge
+
+
+def _orbit(charge: int, path: Tuple[int, Sequence[int], int, Sequence[int]], floor: int,
+           seconds: int) -> Tuple[int, int]:
+    """Follow `_bounce()` for a number of seconds without stepping through all of them.
+
+    Runs in which every offer is taken, or none is, are jumped over in one go. Near capacity the
+    charge is bounded, so it soon comes back to a value it had before, and the cycle it went
+    through is skipped as many times as it fits.
+
+    Args:
+        charge: Charge of the bank at the start.
+        path: The bank's capacity, the offers before it supplies, its drain and the offers after.
+        floor: Lowest charge the bank can supply from without its output dropping.
+        seconds: Amount of seconds to follow.
+
+    Returns:
+        Tuple[int, int]: The amount of seconds followed before the charge would go under `floor`
+            when supplying, and the charge after them.
+    """
+    capacity, before, drain, after = path
+    total = sum(before) + sum(after)
+    rise = total - drain
+    elapsed = 0
+    seen = {}
+    while elapsed < seconds:
+        if charge in seen:
+            period = elapsed - seen[charge]
+            elapsed += (seconds - elapsed) // period * period
+            seen = {}
+            continue
+        seen[charge] = elapsed
+        if charge + total < capacity:
+            if charge + sum(before) < floor:
+                break
+            # Every offer is taken until it's about to fill up.
+            steps = min(seconds - elapsed, (capacity - total - charge - 1) // rise + 1)
+        elif charge - drain >= capacity:
+            # No offer is taken until it's no longer full.
+            steps = seconds - elapsed
+            if drain:
+                steps = min(steps, (charge - drain - capacity) // drain + 1)
+            charge -= steps * drain
+            elapsed += steps
+            continue
+        else:
+            supplying = charge
+            for inflow in before:
+                if supplying < capacity:
+                    supplying += inflow
+            if supplying < floor:
+                break
+            charge = _bounce(charge, *path)
+            elapsed += 1
+            continue
+        charge += steps * rise
+        elapsed += steps
+    return elapsed, charge
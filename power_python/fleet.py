@@ -0,0 +1,331 @@
+import heapq
+import math
+from bisect import bisect_left, insort
+from itertools import islice, takewhile
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+from .power_bank import PowerBank
+
+# A bank's entry in an ordered bucket: its charge level, then its id to break ties.
+_Key = Tuple[float, int, PowerBank]
+
+
+class _SortedKeys():
+    """Sorted keys split into blocks, so adding and removing one only shifts a block."""
+    _BLOCK = 512
+
+    def __init__(self, keys: List[_Key] = ()):
+        """Initialize the `_SortedKeys` with keys that are already sorted."""
+        size = self._BLOCK
+        self._blocks = [keys[start:start + size] for start in range(0, len(keys), size)]
+        # Last key of each block.
+        self._maxes = [block[-1] for block in self._blocks]
+        self._size = len(keys)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def add(self, key: _Key):
+        """Insert a key in order."""
+        if not self._blocks:
+            self._blocks.append([key])
+            self._maxes.append(key)
+        else:
+            index = min(bisect_left(self._maxes, key), len(self._maxes) - 1)
+            block = self._blocks[index]
+            insort(block, key)
+            self._maxes[index] = block[-1]
+            if len(block) > 2 * self._BLOCK:
+                self._blocks[index:index + 1] = [block[:self._BLOCK], block[self._BLOCK:]]
+                self._maxes[index:index + 1] = [block[self._BLOCK - 1], block[-1]]
+        self._size += 1
+
+    def remove(self, key: _Key):
+        """Remove a key that was added before."""
+        index = bisect_left(self._maxes, key)
+        block = self._blocks[index]
+        del block[bisect_left(block, key)]
+        if block:
+            self._maxes[index] = block[-1]
+        else:
+            del self._blocks[index]
+            del self._maxes[index]
+        self._size -= 1
+
+    def rank(self, level: float) -> int:
+        """Amount of keys whose level is under the given one."""
+        index = bisect_left(self._maxes, (level,))
+        below = sum(len(block) for block in self._blocks[:index])
+        if index < len(self._blocks):
+            below += bisect_left(self._blocks[index], (level,))
+        return below
+
+    def smallest(self) -> Iterator[_Key]:
+        """Keys from the smallest up."""
+        for block in self._blocks:
+            yield from block
+
+    def largest(self) -> Iterator[_Key]:
+        """Keys from the largest down."""
+        for block in reversed(self._blocks):
+            yield from reversed(block)
+
+
+class ChargeIndex():
+    """Index of a fleet of banks by charge level, kept up to date as their charge changes.
+
+    Banks are bucketed by the fraction of their capacity they hold, so threshold and top-k
+    queries only look at the buckets involved instead of at every bank. Banks notify the index
+    themselves whenever their charge changes, which costs a dictionary update when they move to
+    another bucket. The empty and full buckets gather every bank under or over the range, so
+    clustered fleets crowd them; they are also kept sorted by charge level. Changes inside them
+    are only noted, and the order is brought up to date by the next query, unless they changed
+    so much since the previous query that scanning them is cheaper. Banks with no capacity count
+    as full. A bank belongs to one index at most.
+    """
+    def __init__(self, banks: Iterable[PowerBank] = (), resolution: int = 1000):
+        """Initialize the `ChargeIndex`.
+
+        Args:
+            banks: The banks to index.
+            resolution: Amount of buckets the charge levels are split into.
+        """
+        self._resolution = resolution
+        self._buckets = [{} for _ in range(resolution + 1)]
+        self._bucket = {}
+        self._ordered = {0: _SortedKeys(), resolution: _SortedKeys()}
+        # Entry of each bank in the ordered buckets, as of the last query.
+        self._keys = {0: {}, resolution: {}}
+        # Banks whose entry may be out of date, and the amount of changes noted so far and up to
+        # the last query.
+        self._stale = {}
+        self._changes = 0
+        self._queried = 0
+        for bank in banks:
+            self.add(bank)
+
+    def _bucket_of(self, bank: PowerBank) -> int:
+        """Bucket matching the current charge level of a bank."""
+        capacity = bank._capacity
+        if capacity <= 0:
+            return self._resolution
+        return min(max(bank._stored_power * self._resolution // capacity, 0), self._resolution)
+
+    @staticmethod
+    def _level(bank: PowerBank) -> float:
+        """Fraction of its capacity a bank holds."""
+        return bank._stored_power / bank._capacity if bank._capacity > 0 else 1.0
+
+    def add(self, bank: PowerBank) -> bool:
+        """Start indexing a bank.
+
+        Args:
+            bank: The bank to index.
+
+        Returns:
+            bool: `True` if it was added, `False` if it was already indexed.
+
+        Raises:
+            ValueError: If the bank belongs to another index.
+        """
+        if bank in self._bucket:
+            return False
+        if bank._fleet is not None:
+            raise ValueError('the bank already belongs to another index')
+        bucket = self._bucket[bank] = self._bucket_of(bank)
+        self._buckets[bucket][bank] = None
+        if bucket in self._ordered:
+            self._stale[bank] = None
+            self._changes += 1
+        bank._fleet = self
+        return True
+
+    def remove(self, bank: PowerBank) -> bool:
+        """Stop indexing a bank.
+
+        Args:
+            bank: The bank to drop.
+
+        Returns:
+            bool: `True` if it was removed, `False` if it wasn't indexed.
+        """
+        bucket = self._bucket.pop(bank, None)
+        if bucket is None:
+            return False
+        del self._buckets[bucket][bank]
+        if bucket in self._ordered:
+            self._stale[bank] = None
+            self._changes += 1
+        bank._fleet = None
+        return True
+
+    def count(self) -> int:
+        """Getter for the amount of indexed banks.
+
+        Returns:
+            int: Banks in the index.
+        """
+        return len(self._bucket)
+
+    def update(self, bank: PowerBank):
+        """Move a bank to the bucket matching its charge. Banks call it whenever it changes.
+
+        Args:
+            bank: An indexed bank. Other banks are ignored.
+        """
+        bucket = self._bucket.get(bank)
+        if bucket is not None:
+            # Same as `_bucket_of()`, inlined since banks call this on every change.
+            capacity = bank._capacity
+            resolution = self._resolution
+            new = bank._stored_power * resolution // capacity if capacity > 0 else resolution
+            if new < 0:
+                new = 0
+            elif new > resolution:
+                new = resolution
+            if new != bucket:
+                del self._buckets[bucket][bank]
+                self._buckets[new][bank] = None
+                self._bucket[bank] = new
+            if bucket in self._ordered or new in self._ordered:
+                self._stale[bank] = None
+                self._changes += 1
+
+    def _sort(self) -> Dict[int, _SortedKeys]:
+        """Bring the order of the ordered buckets up to date, if it's worth it.
+
+        Called once per query.
+
+        Returns:
+            Dict[int, _SortedKeys]: The ordered buckets, or none if they churn too much for now.
+        """
+        stale = self._stale
+        churn = self._changes - self._queried
+        self._queried = self._changes
+        if not stale:
+            return self._ordered
+        size = sum(len(self._buckets[bucket]) for bucket in self._ordered)
+        if 8 * len(stale) > size:
+            if 8 * churn > size:
+                # They keep changing between queries, so they're scanned instead.
+                return {}
+            # Cheaper to sort the buckets again than to move so many entries one at a time.
+            for bucket in self._ordered:
+                entries = [(bank._stored_power / bank._capacity if bank._capacity > 0 else 1.0,
+                            id(bank), bank) for bank in self._buckets[bucket]]
+                entries.sort()
+                self._ordered[bucket] = _SortedKeys(entries)
+                self._keys[bucket] = {key[2]: key for key in entries}
+        else:
+            for bank in stale:
+                for bucket, keys in self._keys.items():
+                    key = keys.pop(bank, None)
+                    if key is not None:
+                        self._ordered[bucket].remove(key)
+                bucket = self._bucket.get(bank)
+                if bucket in self._ordered:
+                    key = self._keys[bucket][bank] = (self._level(bank), id(bank), bank)
+                    self._ordered[bucket].add(key)
+        stale.clear()
+        return self._ordered
+
+    def _boundary(self, fraction: float) -> int:
+        """Bucket holding the given charge level."""
+        return min(max(math.floor(fraction * self._resolution), 0), self._resolution)
+
+    def below(self, fraction: float) -> List[PowerBank]:
+        """Banks holding less than a fraction of their capacity.
+
+        Args:
+            fraction: Charge level, 0.1 meaning 10% of the capacity.
+
+        Returns:
+            List[PowerBank]: The banks under that level, in no particular order.
+        """
+        boundary = self._boundary(fraction)
+        banks = [bank for bucket in self._buckets[:boundary] for bank in bucket]
+        ordered = self._sort().get(boundary)
+        if ordered is not None:
+            keys = takewhile(lambda key: key[0] < fraction, ordered.smallest())
+            banks += [key[2] for key in keys]
+        else:
+            banks += [bank for bank in self._buckets[boundary] if self._level(bank) < fraction]
+        return banks
+
+    def at_least(self, fraction: float) -> List[PowerBank]:
+        """Banks holding a fraction of their capacity or more.
+
+        Args:
+            fraction: Charge level, 0.9 meaning 90% of the capacity.
+
+        Returns:
+            List[PowerBank]: The banks at that level or above, in no particular order.
+        """
+        boundary = self._boundary(fraction)
+        ordered = self._sort().get(boundary)
+        if ordered is not None:
+            keys = takewhile(lambda key: key[0] >= fraction, ordered.largest())
+            banks = [key[2] for key in keys]
+        else:
+            banks = [bank for bank in self._buckets[boundary] if self._level(bank) >= fraction]
+        banks += [bank for bucket in self._buckets[boundary + 1:] for bank in bucket]
+        return banks
+
+    def count_below(self, fraction: float) -> int:
+        """Amount of banks holding less than a fraction of their capacity.
+
+        Args:
+            fraction: Charge level, 0.1 meaning 10% of the capacity.
+
+        Returns:
+            int: How many banks `below()` would return.
+        """
+        boundary = self._boundary(fraction)
+        below = sum(len(bucket) for bucket in self._buckets[:boundary])
+        ordered = self._sort().get(boundary)
+        if ordered is not None:
+            return below + ordered.rank(fraction)
+        return below + sum(1 for bank in self._buckets[boundary] if self._level(bank) < fraction)
+
+    def fullest(self, count: int) -> List[PowerBank]:
+        """Banks holding the largest fractions of their capacity.
+
+        Args:
+            count: Amount of banks to return.
+
+        Returns:
+            List[PowerBank]: Up to `count` banks, the fullest first.
+        """
+        return self._top(reversed(range(len(self._buckets))), count, True)
+
+    def emptiest(self, count: int) -> List[PowerBank]:
+        """Banks holding the smallest fractions of their capacity.
+
+        Args:
+            count: Amount of banks to return.
+
+        Returns:
+            List[PowerBank]: Up to `count` banks, the emptiest first.
+        """
+        return self._top(range(len(self._buckets)), count, False)
+
+    def _top(self, buckets: Iterable[int], count: int, fullest: bool) -> List[PowerBank]:
+        """Walk the buckets in order, only ordering the banks the answer takes from them."""
+        sorted_buckets = self._sort()
+        banks = []
+        for index in buckets:
+            missing = count - len(banks)
+            if missing <= 0:
+                break
+            ordered = sorted_buckets.get(index)
+            if ordered is not None:
+                keys = ordered.largest() if fullest else ordered.smallest()
+                banks += [key[2] for key in islice(keys, missing)]
+                continue
+            bucket = self._buckets[index]
+            if len(bucket) <= missing:
+                banks += sorted(bucket, key=self._level, reverse=fullest)
+            else:
+                select = heapq.nlargest if fullest else heapq.nsmallest
+                banks += select(missing, bucket, key=self._level)
+        return banks
@@ -0,0 +1,283 @@
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .grid_engine import reachable
+from .power_bank import PowerBank
+from .power_consumer import PowerConsumer
+from .power_source import PowerSource
+
+# Capacity of the connections themselves, which never limit the flow.
+_UNLIMITED = 2 ** 62
+_SOURCE = 0
+_SINK = 1
+
+
+class FlowSolver():
+    """Supplies a whole grid at once, as a min-cost max-flow problem solved on every tick.
+
+    Consumers connected to several sources get their input from all of them together, instead of
+    depending on the order the sources are supplied in. Every tick, as much demand as possible is
+    covered, preferring the cheapest sources; by default a source costs its position in the
+    walk from the given sources, so they're preferred over the banks further down the grid.
+
+    Banks supply from the charge they had when the tick started, and what they receive is stored
+    after that, so power never goes through more than one connection per tick. Each consumer's
+    `receive_power()` is called once with everything it got, and the efficiency it returns is
+    recorded on all the connections feeding it.
+
+    The solution of a tick is the starting point of the next one: if no output or input changed
+    it's reused as is, otherwise it's repaired rather than computed from scratch. Call
+    `refresh()` after changing connections.
+    """
+    def __init__(self, sources: Iterable[PowerSource],
+                 costs: Optional[Dict[PowerSource, int]] = None):
+        """Initialize the `FlowSolver`.
+
+        Args:
+            sources: The power sources feeding the grid.
+            costs: Cost of each watt supplied by a source. Sources not listed cost their position
+                among the sources of the grid.
+
+        Raises:
+            ValueError: If a source uses an allocation policy.
+        """
+        self._sources = list(sources)
+        self._costs = dict(costs or {})
+        self.refresh()
+
+    def refresh(self):
+        """Rebuild the flow network after connections changed, dropping the last solution.
+
+        Raises:
+            ValueError: If a source uses an allocation policy.
+        """
+        nodes = reachable(self._sources)
+        suppliers = [node for node in nodes if isinstance(node, PowerSource)]
+        if any(supplier.policy() is not None for supplier in suppliers):
+            raise ValueError('FlowSolver only supports the default greedy allocation')
+        consumers = [node for node in nodes if isinstance(node, PowerConsumer)
+                     and any(node in supplier._connections for supplier in suppliers)]
+        self._suppliers = suppliers
+        self._consumers = consumers
+        self._to = []
+        self._capacity = []
+        self._cost = []
+        self._edges = [[] for _ in range(2 + len(suppliers) + len(consumers))]
+        self._supply_edges = [self._add_edge(_SOURCE, 2 + index, 0, 0)
+                              for index in range(len(suppliers))]
+        consumer_node = {id(consumer): 2 + len(suppliers) + index
+                         for index, consumer in enumerate(consumers)}
+        # Per connection: supplier index, consumer index, edge, and where its counters are.
+        self._links = []
+        for index, supplier in enumerate(suppliers):
+            cost = self._costs.get(supplier, index)
+            for consumer, offset in supplier._connections.items():
+                node = consumer_node[id(consumer)]
+                edge = self._add_edge(2 + index, node, _UNLIMITED, cost)
+                self._links.append((index, node - 2 - len(suppliers), edge, supplier._stats,
+                                    offset))
+        self._demand_edges = [self._add_edge(2 + len(suppliers) + index, _SINK, 0, 0)
+                              for index in range(len(consumers))]
+        self._outputs = None
+        self._inputs = None
+
+    def _add_edge(self, tail: int, head: int, capacity: int, cost: int) -> int:
+        """Add an edge and its residual twin, returning the index of the edge."""
+        edge = len(self._to)
+        self._to += [head, tail]
+        self._capacity += [capacity, 0]
+        self._cost += [cost, -cost]
+        self._edges[tail].append(edge)
+        self._edges[head].append(edge + 1)
+        return edge
+
+    def suppliers(self) -> List[PowerSource]:
+        """Getter for every source of the grid, banks included.
+
+        Returns:
+            List[PowerSource]: The sources, in the order `tick()` reports them.
+        """
+        return list(self._suppliers)
+
+    def flows(self) -> List[Tuple[PowerSource, PowerConsumer, int]]:
+        """The allocation of the last solved tick.
+
+        Returns:
+            List[Tuple[PowerSource, PowerConsumer, int]]: Watts going through each connection.
+        """
+        return [(self._suppliers[supplier], self._consumers[consumer], self._capacity[edge ^ 1])
+                for supplier, consumer, edge, _, _ in self._links]
+
+    def solve(self) -> bool:
+        """Allocate the current outputs among the current inputs, without powering anything.
+
+        Returns:
+            bool: `False` if nothing changed since the last solution and it was reused as is.
+        """
+        outputs = [max(supplier.output(), 0) for supplier in self._suppliers]
+        inputs = [consumer.input() for consumer in self._consumers]
+        if outputs == self._outputs and inputs == self._inputs:
+            return False
+        capacity = self._capacity
+        warm = self._outputs is not None
+        # Give back the flow that no longer fits, and leave the rest as it was.
+        for supplier, consumer, edge, _, _ in reversed(self._links):
+            excess = max(capacity[self._supply_edges[supplier] ^ 1] - outputs[supplier],
+                         capacity[self._demand_edges[consumer] ^ 1] - inputs[consumer], 0)
+            excess = min(excess, capacity[edge ^ 1])
+            if excess:
+                for path_edge in (self._supply_edges[supplier], edge,
+                                  self._demand_edges[consumer]):
+                    capacity[path_edge] += excess
+                    capacity[path_edge ^ 1] -= excess
+        for edges, limits in ((self._supply_edges, outputs), (self._demand_edges, inputs)):
+            for edge, limit in zip(edges, limits):
+                capacity[edge] = limit - capacity[edge ^ 1]
+        self._outputs = outputs
+        self._inputs = inputs
+        if warm:
+            self._cancel_cycles()
+        self._augment()
+        return True
+
+    def _shortest_paths(self, starts: Iterable[int]) -> Tuple[List[int], List[int], int]:
+        """Bellman-Ford, queue based, over the edges with capacity left.
+
+        Returns:
+            Tuple[List[int], List[int], int]: Distances, the edge reaching each node, and a node
+                on a negative cycle, or -1 if there's none.
+        """
+        to, capacity, cost, edges = self._to, self._capacity, self._cost, self._edges
+        size = len(edges)
+        distance = [_UNLIMITED] * size
+        parent = [-1] * size
+        length = [0] * size
+        queued = [False] * size
+        queue = deque()
+        for start in starts:
+            distance[start] = 0
+            queued[start] = True
+            queue.append(start)
+        while queue:
+            node = queue.popleft()
+            queued[node] = False
+            for edge in edges[node]:
+                if capacity[edge] > 0:
+                    head = to[edge]
+                    candidate = distance[node] + cost[edge]
+                    if candidate < distance[head]:
+                        distance[head] = candidate
+                        parent[head] = edge
+                        length[head] = length[node] + 1
+                        if length[head] >= size:
+                            cycle = self._find_cycle(parent, head)
+                            if cycle >= 0:
+                                return distance, parent, cycle
+                            length[head] = 0
+                        if not queued[head]:
+                            queued[head] = True
+                            queue.append(head)
+        return distance, parent, -1
+
+    def _find_cycle(self, parent: List[int], node: int) -> int:
+        """Follow the edges reaching each node back from `node`, returning a node on a cycle."""
+        seen = set()
+        while node not in seen:
+            if parent[node] < 0:
+                return -1
+            seen.add(node)
+            node = self._to[parent[node] ^ 1]
+        return node
+
+    def _cancel_cycles(self):
+        """Reroute flow along negative cycles until the allocation is the cheapest again."""
+        capacity, to = self._capacity, self._to
+        while True:
+            _, parent, node = self._shortest_paths(range(len(self._edges)))
+            if node < 0:
+                return
+            cycle = []
+            current = node
+            while True:
+                edge = parent[current]
+                cycle.append(edge)
+                current = to[edge ^ 1]
+                if current == node:
+                    break
+            amount = min(capacity[edge] for edge in cycle)
+            for edge in cycle:
+                capacity[edge] -= amount
+                capacity[edge ^ 1] += amount
+
+    def _augment(self):
+        """Push flow along the cheapest paths until no more demand can be covered.
+
+        Each round computes the distances once and then pushes flow along every path made only
+        of edges on a shortest path, so there are about as many rounds as different path costs.
+        """
+        capacity, cost, to, edges = self._capacity, self._cost, self._to, self._edges
+        while True:
+            distance, _, _ = self._shortest_paths([_SOURCE])
+            if distance[_SINK] == _UNLIMITED:
+                return
+            visited = [False] * len(edges)
+            visited[_SOURCE] = True
+            position = [0] * len(edges)
+            while True:
+                stack = [_SOURCE]
+                path = []
+                while stack and stack[-1] != _SINK:
+                    node = stack[-1]
+                    node_edges = edges[node]
+                    while position[node] < len(node_edges):
+                        edge = node_edges[position[node]]
+                        head = to[edge]
+                        if (capacity[edge] > 0 and not visited[head]
+                                and distance[head] == distance[node] + cost[edge]):
+                            visited[head] = True
+                            stack.append(head)
+                            path.append(edge)
+                            break
+                        position[node] += 1
+                    else:
+                        # Nothing left to reach from here in this round.
+                        stack.pop()
+                        if path:
+                            path.pop()
+                if not stack:
+                    break
+                amount = min(capacity[edge] for edge in path)
+                for edge in path:
+                    capacity[edge] -= amount
+                    capacity[edge ^ 1] += amount
+                for node in stack[1:]:
+                    visited[node] = False
+
+    def tick(self) -> List[int]:
+        """Advance the whole grid by one second.
+
+        Returns:
+            List[int]: Power remaining on each source after supplying its consumers, in the order
+                of `suppliers()`.
+        """
+        self.solve()
+        capacity = self._capacity
+        remaining = []
+        for supplier, edge, output in zip(self._suppliers, self._supply_edges, self._outputs):
+            supplier._settle()
+            supplied = capacity[edge ^ 1]
+            if isinstance(supplier, PowerBank):
+                supplier._store(supplier._stored_power - supplied)
+            remaining.append(output - supplied)
+        efficiencies = [consumer.receive_power(capacity[edge ^ 1])
+                        for consumer, edge in zip(self._consumers, self._demand_edges)]
+        for _, consumer, _, stats, offset in self._links:
+            efficiency = efficiencies[consumer]
+            stats[offset] = efficiency
+            if efficiency < stats[offset + 1]:
+                stats[offset + 1] = efficiency
+            stats[offset + 2] += efficiency
+            if efficiency < 100:
+                stats[offset + 3] += 1
+            stats[offset + 4] += 1
+        return remaining
@@ -0,0 +1,213 @@
+from array import array
+from bisect import bisect_right
+from itertools import accumulate
+from typing import Iterable, List
+
+from .power_bank import PowerBank
+from .power_consumer import PowerConsumer
+from .power_source import PowerSource
+from .subgrid import SubGrid
+
+
+def reachable(sources: Iterable[PowerSource]) -> List:
+    """Collect every object reachable through the connections of the given sources.
+
+    Args:
+        sources: The power sources to start walking from.
+
+    Returns:
+        List: The given sources, followed by the rest of the objects fed by them. The order is
+            deterministic, so it's the same for copies of the same grid.
+    """
+    nodes = []
+    seen = set()
+    for source in sources:
+        if id(source) not in seen:
+            seen.add(id(source))
+            nodes.append(source)
+    pending = list(nodes)
+    while pending:
+        for consumer in pending.pop()._connections:
+            if id(consumer) not in seen:
+                seen.add(id(consumer))
+                nodes.append(consumer)
+                if isinstance(consumer, PowerSource):
+                    pending.append(consumer)
+    return nodes
+
+
+def _reject_groups(nodes: Iterable):
+    """Reject grids holding a `SubGrid`, whose members `reachable()` can't see."""
+    if any(isinstance(node, SubGrid) for node in nodes):
+        raise ValueError('the devices under a SubGrid are not reachable, power it with '
+                         'supply_power() instead')
+
+
+class GridEngine():
+    """Batch simulator for an existing graph of power objects.
+
+    The graph reachable from the given sources is packed into flat arrays once, and every tick
+    reproduces what calling `supply_power()` on each source, in the given order, would do.
+    Consumers that aren't a `PowerBank` are treated as stateless loads: only their `input()` is
+    read (once, when packing) and their `receive_power()` isn't called. Sources must use the
+    default greedy allocation, and grids can't hold a `SubGrid`.
+    """
+    def __init__(self, sources: Iterable[PowerSource]):
+        """Initialize the `GridEngine`.
+
+        Args:
+            sources: The power sources supplied on every tick, in the order they'll be supplied.
+
+        Raises:
+            ValueError: If a source uses an allocation policy, or the grid holds a `SubGrid`.
+        """
+        sources = list(sources)
+        self._nodes = reachable(sources)
+        _reject_groups(self._nodes)
+        if any(isinstance(node, PowerSource) and node.policy() is not None for node in self._nodes):
+            raise ValueError('GridEngine only supports the default greedy allocation')
+        self._index = {id(node): index for index, node in enumerate(self._nodes)}
+        self._sources = [self._index[id(source)] for source in sources]
+
+        self._is_bank = [isinstance(node, PowerBank) for node in self._nodes]
+        self._input = array('q', [node.input() if isinstance(node, PowerConsumer) else 0
+                                  for node in self._nodes])
+        self._max_output = array('q', [node.max_output() if self._is_bank[i]
+                                       else node.output() if isinstance(node, PowerSource) else 0
+                                       for i, node in enumerate(self._nodes)])
+        self._capacity = array('q', [node.capacity() if self._is_bank[i] else 0
+                                     for i, node in enumerate(self._nodes)])
+        self._stored = array('q', [node.stored_power() if self._is_bank[i] else 0
+                                   for i, node in enumerate(self._nodes)])
+
+        self._targets = []
+        self._demand = []
+        self._bank_targets = []
+        for source in self._sources:
+            targets = array('q', [self._index[id(c)] for c in self._nodes[source]._connections])
+            self._targets.append(targets)
+            self._demand.append(array('q', accumulate(self._input[t] for t in targets)))
+            self._bank_targets.append([(position, target) for position, target in enumerate(targets)
+                                       if self._is_bank[target]])
+        self._remaining = array('q', bytes(8 * len(self._sources)))
+        self._cutoff = array('q', bytes(8 * len(self._sources)))
+        self._available = array('q', bytes(8 * len(self._sources)))
+        self._ticks = 0
+
+    def ticks(self) -> int:
+        """Getter for the amount of ticks simulated so far.
+
+        Returns:
+            int: Number of seconds advanced by this engine.
+        """
+        return self._ticks
+
+    def tick(self) -> List[int]:
+        """Advance the whole grid by one second.
+
+        Returns:
+            List[int]: Power remaining on each source after supplying its consumers, in the same
+                order the sources were given.
+        """
+        self.run(1)
+        return self._remaining.tolist()
+
+    def run(self, ticks: int):
+        """Advance the whole grid by the given amount of seconds.
+
+        Args:
+            ticks: Amount of seconds to simulate.
+        """
+        stored = self._stored
+        capacity = self._capacity
+        max_output = self._max_output
+        is_bank = self._is_bank
+        remaining = self._remaining
+        cutoff = self._cutoff
+        available = self._available
+        plan = list(zip(range(len(self._sources)), self._sources, self._demand,
+                        self._bank_targets))
+        for _ in range(ticks):
+            for slot, source, demand, banks in plan:
+                if is_bank[source]:
+                    if stored[source] <= 0:
+                        remaining[slot] = stored[source]
+                        cutoff[slot] = -1
+                        continue
+                    power = min(stored[source], max_output[source])
+                else:
+                    power = max_output[source]
+                # Consumers before the cutoff take their whole input, the one at the cutoff takes
+                # whatever is left and the ones after it get nothing.
+                position = bisect_right(demand, power)
+                cutoff[slot] = position
+                available[slot] = power
+                for index, target in banks:
+                    if index < position:
+                        supply = demand[index] - (demand[index - 1] if index else 0)
+                    elif index == position:
+                        supply = power - (demand[index - 1] if index else 0)
+                    else:
+                        supply = 0
+                    if stored[target] < capacity[target]:
+                        stored[target] += supply
+                left = power - demand[position - 1] if position else power
+                if position < len(demand):
+                    left = 0
+                remaining[slot] = left
+                if is_bank[source]:
+                    stored[source] -= min(stored[source], max_output[source]) - left
+            self._ticks += 1
+
+    def remaining(self) -> List[int]:
+        """Getter for the power left over by each source on the last tick.
+
+        Returns:
+            List[int]: Remaining power per source, in the order the sources were given.
+        """
+        return self._remaining.tolist()
+
+    def stored_power(self, bank: PowerBank) -> int:
+        """Getter for the simulated charge of a bank.
+
+        Args:
+            bank: A `PowerBank` that is part of the packed grid.
+
+        Returns:
+            int: Amount of stored energy, measured in Joules.
+        """
+        return self._stored[self._index[id(bank)]]
+
+    def supplied(self, source: PowerSource, consumer: PowerConsumer) -> int:
+        """Amount of power the given source handed to a consumer on the last tick.
+
+        Args:
+            source: One of the sources supplied by this engine.
+            consumer: An object connected to `source`.
+
+        Returns:
+            int: Watts received by `consumer` from `source` during the last simulated second.
+        """
+        slot = self._sources.index(self._index[id(source)])
+        position = list(self._nodes[self._sources[slot]]._connections).index(consumer)
+        demand = self._demand[slot]
+        if self._ticks == 0 or position > self._cutoff[slot]:
+            return 0
+        before = demand[position - 1] if position else 0
+        if position < self._cutoff[slot]:
+            return demand[position] - before
+        return self._available[slot] - before
+
+    def charges(self) -> List[int]:
+        """Getter for the simulated charge of every bank in the grid.
+
+        Returns:
+            List[int]: Stored energy of each `PowerBank`, in the order given by `reachable()`.
+        """
+        return [self._stored[index] for index, bank in enumerate(self._is_bank) if bank]
+
+    def sync(self):
+        """Write the simulated charges back into the `PowerBank` objects."""
+        for index, node in enumerate(self._nodes):
+            if self._is_bank[index]:
+                node._store(self._stored[index])
@@ -0,0 +1,215 @@
+import struct
+import time
+from array import array
+from multiprocessing import resource_tracker, shared_memory
+from typing import Callable, Dict, Iterable, NamedTuple, Optional, TypeVar
+
+from .power_bank import PowerBank
+from .power_consumer import PowerConsumer
+from .power_source import PowerSource
+from .recorder import Recorder
+
+MAGIC = b'PWRLIVE1'
+# Magic, sequence number, tick and amount of devices.
+HEADER = struct.Struct('<8sqqq')
+FIELD = struct.Struct('<q')
+SEQUENCE_OFFSET = 8
+TICK_OFFSET = 16
+COLUMNS = Recorder.COLUMNS
+
+T = TypeVar('T')
+
+
+class LiveSnapshot(NamedTuple):
+    """Copy of the published state of a grid, as of one tick.
+
+    Attributes:
+        tick: Tick the state was published on.
+        stored_power: Charge of each device, 0 for the ones that aren't banks.
+        output: Current output of each device, 0 for the ones that aren't sources.
+        efficiency: Efficiency last reported by each device, 0 for the ones without a feeder.
+    """
+    tick: int
+    stored_power: array
+    output: array
+    efficiency: array
+
+
+class LiveState():
+    """Publishes the numeric state of a grid in shared memory, for other processes to read.
+
+    The values are those of `Recorder.COLUMNS`, one column per value and one entry per device,
+    after a header holding a sequence number. The sequence number is odd while an update is being
+    written, so readers attached through `LiveView` can tell whether what they read belongs to a
+    single tick without ever blocking the simulation.
+    """
+    def __init__(self, devices: Iterable[PowerConsumer], every: int = 1,
+                 name: Optional[str] = None):
+        """Initialize the `LiveState`, creating the shared memory block.
+
+        Args:
+            devices: The power objects to publish, in the order readers will find them.
+            every: Amount of ticks between updates.
+            name: Name of the shared memory block. A unique one is picked when not given.
+        """
+        self._devices = list(devices)
+        self._every = every
+        self._tick = 0
+        self._sequence = 0
+        self._feeders = {}
+        for device in self._devices:
+            if isinstance(device, PowerSource):
+                for consumer in device._connections:
+                    self._feeders.setdefault(id(consumer), device)
+        count = len(self._devices)
+        self._memory = shared_memory.SharedMemory(
+            name, create=True, size=HEADER.size + len(COLUMNS) * count * 8)
+        HEADER.pack_into(self._memory.buf, 0, MAGIC, 0, 0, count)
+        self._columns = [self._memory.buf[HEADER.size + index * count * 8:
+                                          HEADER.size + (index + 1) * count * 8].cast('q')
+                         for index in range(len(COLUMNS))]
+
+    def name(self) -> str:
+        """Getter for the name readers attach to.
+
+        Returns:
+            str: Name of the shared memory block.
+        """
+        return self._memory.name
+
+    def record(self):
+        """Account for one simulated tick, publishing the state if it's due."""
+        self._tick += 1
+        if self._tick % self._every == 0:
+            self.publish()
+
+    def publish(self):
+        """Write the current state of the devices now."""
+        stored = array('q', [device._stored_power if isinstance(device, PowerBank) else 0
+                             for device in self._devices])
+        output = array('q', [device.output() if isinstance(device, PowerSource) else 0
+                             for device in self._devices])
+        efficiency = array('q', [self._efficiency(device) for device in self._devices])
+        buffer = self._memory.buf
+        FIELD.pack_into(buffer, SEQUENCE_OFFSET, self._sequence + 1)
+        for column, values in zip(self._columns, (stored, output, efficiency)):
+            column[:] = values
+        FIELD.pack_into(buffer, TICK_OFFSET, self._tick)
+        self._sequence += 2
+        FIELD.pack_into(buffer, SEQUENCE_OFFSET, self._sequence)
+
+    def _efficiency(self, device: PowerConsumer) -> int:
+        """Efficiency last reported by a device to its published feeder, if any."""
+        feeder = self._feeders.get(id(device))
+        return feeder.efficiency(device) if feeder is not None else 0
+
+    def close(self, unlink: bool = True):
+        """Release the shared memory block.
+
+        Args:
+            unlink: Whether to destroy the block. Attached readers keep their mapping.
+        """
+        for column in self._columns:
+            column.release()
+        self._memory.close()
+        if unlink:
+            self._memory.unlink()
+
+
+class LiveView():
+    """Read-only access to the state published by a `LiveState`, usually from another process."""
+    def __init__(self, name: str):
+        """Attach to a published grid.
+
+        Args:
+            name: Name of the shared memory block, as given by `LiveState.name()`.
+
+        Raises:
+            ValueError: If the block wasn't created by a `LiveState`.
+        """
+        try:
+            self._memory = shared_memory.SharedMemory(name, track=False)
+        except TypeError:
+            # Before Python 3.13 attaching registers the block, which would be destroyed once
+            # this process exits.
+            self._memory = shared_memory.SharedMemory(name)
+            resource_tracker.unregister(self._memory._name, 'shared_memory')
+        buffer = self._memory.buf.toreadonly()
+        magic, _, _, count = HEADER.unpack_from(buffer)
+        if magic != MAGIC:
+            buffer.release()
+            self._memory.close()
+            raise ValueError(f'{name} is not a live grid state')
+        self._buffer = buffer
+        self._columns = {column: buffer[HEADER.size + index * count * 8:
+                                        HEADER.size + (index + 1) * count * 8].cast('q')
+                         for index, column in enumerate(COLUMNS)}
+
+    def sequence(self) -> int:
+        """Getter for the sequence number of the published state.
+
+        Returns:
+            int: Twice the amount of updates written, plus one while an update is in progress.
+        """
+        return FIELD.unpack_from(self._buffer, SEQUENCE_OFFSET)[0]
+
+    def column(self, name: str) -> memoryview:
+        """Zero-copy view over one of the published columns.
+
+        The values keep changing as updates are written; use `read()` or `snapshot()` to get
+        values belonging to a single tick.
+
+        Args:
+            name: One of `Recorder.COLUMNS`.
+
+        Returns:
+            memoryview: Read-only view with one entry per device.
+        """
+        return self._columns[name]
+
+    def read(self, reader: Callable[[Dict[str, memoryview]], T], attempts: int = 10000) -> T:
+        """Run a function over the published columns, retrying until no update interferes.
+
+        Args:
+            reader: Receives the zero-copy views by column name. It may run more than once, so it
+                shouldn't keep the views.
+            attempts: Amount of tries before giving up.
+
+        Returns:
+            T: What `reader` returned on the first try during which no update was written.
+
+        Raises:
+            TimeoutError: If every try overlapped an update.
+        """
+        for _ in range(attempts):
+            before = self.sequence()
+            if not before % 2:
+                result = reader(self._columns)
+                if self.sequence() == before:
+                    return result
+            time.sleep(0)
+        raise TimeoutError('the published state kept changing while being read')
+
+    def snapshot(self, attempts: int = 10000) -> LiveSnapshot:
+        """Copy the published state of a single tick.
+
+        Args:
+            attempts: Amount of tries before giving up.
+
+        Returns:
+            LiveSnapshot: The values of every device as of the last update.
+
+        Raises:
+            TimeoutError: If every try overlapped an update.
+        """
+        def copy(columns: Dict[str, memoryview]) -> LiveSnapshot:
+            tick = FIELD.unpack_from(self._buffer, TICK_OFFSET)[0]
+            return LiveSnapshot(tick, *(array('q', columns[column]) for column in COLUMNS))
+        return self.read(copy, attempts)
+
+    def close(self):
+        """Detach from the published grid."""
+        for column in self._columns.values():
+            column.release()
+        self._buffer.release()
+        self._memory.close()
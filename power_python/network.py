@@ -0,0 +1,147 @@
+from array import array
+from collections import deque
+from typing import List
+
+from .grid_engine import reachable
+from .power_consumer import PowerConsumer
+from .power_source import EfficiencyStats, PowerSource
+
+
+class PowerNetwork():
+    """Container owning a set of power objects and the connections between them.
+
+    Every topology change must go through the network, which keeps the connections free of
+    cycles and caches the order sources are supplied in: a source always ticks before anything
+    it feeds, so banks get charged before they discharge downstream.
+    """
+    def __init__(self):
+        """Initialize an empty `PowerNetwork`."""
+        self._nodes = {}
+        self._schedule = None
+
+    def add(self, node: PowerConsumer) -> bool:
+        """Adds a power object into the network.
+
+        Args:
+            node: The `PowerSource`, `PowerConsumer` or `PowerBank` to add. Its existing
+                connections are added along with it.
+
+        Returns:
+            bool: `True` if it was added, `False` if it was already part of the network.
+        """
+        if node in self._nodes:
+            return False
+        for reached in reachable([node]) if isinstance(node, PowerSource) else [node]:
+            self._nodes.setdefault(reached)
+        self._schedule = None
+        return True
+
+    def nodes(self) -> List[PowerConsumer]:
+        """Getter for the objects in the network.
+
+        Returns:
+            List[PowerConsumer]: Every object added to the network, in the order it was added.
+        """
+        return list(self._nodes)
+
+    def connect(self, source: PowerSource, consumer: PowerConsumer) -> bool:
+        """Connects a consumer into a source's network, adding both to this network.
+
+        Args:
+            source: The object that will supply power.
+            consumer: The object that will start consuming from `source`.
+
+        Returns:
+            bool: `True` if it was connected successfully, `False` if the object was already
+                connected, if `source` rejected it or if the connection would close a cycle.
+        """
+        if self._reaches(consumer, source) or not source.connect(consumer):
+            return False
+        self.add(source)
+        self.add(consumer)
+        self._schedule = None
+        return True
+
+    def disconnect(self, source: PowerSource, consumer: PowerConsumer) -> bool:
+        """Removes a consumer from a source's network.
+
+        Args:
+            source: The object supplying power.
+            consumer: The object that will stop consuming from `source`.
+
+        Returns:
+            bool: `True` if it was disconnected successfully, `False` if it wasn't connected.
+        """
+        if not source.disconnect(consumer):
+            return False
+        self._schedule = None
+        return True
+
+    def _reaches(self, start: PowerConsumer, target: PowerConsumer) -> bool:
+        """Checks whether `target` is fed, directly or not, by `start`."""
+        pending = [start]
+        seen = {id(start)}
+        while pending:
+            node = pending.pop()
+            if node is target:
+                return True
+            for consumer in getattr(node, '_connections', ()):
+                if id(consumer) not in seen:
+                    seen.add(id(consumer))
+                    pending.append(consumer)
+        return False
+
+    def schedule(self) -> List[PowerSource]:
+        """Getter for the order sources are supplied in on every tick.
+
+        It's computed once and reused until the topology changes.
+
+        Returns:
+            List[PowerSource]: Every source in the network, each one placed before the sources
+                it feeds.
+
+        Raises:
+            ValueError: If connections made outside the network closed a cycle.
+        """
+        if self._schedule is None:
+            sources = [node for node in self._nodes if isinstance(node, PowerSource)]
+            feeders = {id(source): 0 for source in sources}
+            for source in sources:
+                for consumer in source._connections:
+                    if id(consumer) in feeders:
+                        feeders[id(consumer)] += 1
+            ready = deque(source for source in sources if not feeders[id(source)])
+            order = []
+            while ready:
+                source = ready.popleft()
+                order.append(source)
+                for consumer in source._connections:
+                    if id(consumer) in feeders:
+                        feeders[id(consumer)] -= 1
+                        if not feeders[id(consumer)]:
+                            ready.append(consumer)
+            if len(order) != len(sources):
+                raise ValueError('The network connections contain a cycle')
+            self._schedule = order
+        return self._schedule
+
+    def tick(self) -> List[int]:
+        """Supply every source of the network during one second, following the schedule.
+
+        Returns:
+            List[int]: Power remaining on each source, in schedule order.
+        """
+        return [source.supply_power() for source in self.schedule()]
+
+    def efficiency_stats(self) -> EfficiencyStats:
+        """Efficiency counters of every connection in the network.
+
+        Returns:
+            EfficiencyStats: One entry per connection, grouped by source in schedule order.
+        """
+        merged = EfficiencyStats([], [], array('q'), array('q'), array('d'), array('q'),
+                                 array('q'))
+        for source in self.schedule():
+            for column, values in zip(merged, source.efficiency_stats()):
+                column.extend(values)
+        return merged
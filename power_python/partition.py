@@ -0,0 +1,272 @@
+import os
+from multiprocessing import Pipe, Process
+from multiprocessing.connection import Connection
+from typing import Iterable, List, Optional
+
+from .grid_engine import GridEngine, _reject_groups, reachable
+from .power_bank import PowerBank
+from .power_source import PowerSource
+from .scenario import _build, _columns
+
+
+def components(sources: Iterable[PowerSource]) -> List[List[PowerSource]]:
+    """Split the grid fed by the given sources into independent sub-grids.
+
+    Two sources belong to the same sub-grid when they are linked by connections, in whichever
+    direction, so ticking one of them can never affect the other ones.
+
+    Args:
+        sources: The power sources supplied on every tick, in the order they'll be supplied.
+
+    Returns:
+        List[List[PowerSource]]: The sources of each sub-grid, keeping their relative order.
+    """
+    sources = list(sources)
+    parent = {}
+
+    def find(node: int) -> int:
+        root = node
+        while parent[root] != root:
+            root = parent[root]
+        while parent[node] != root:
+            parent[node], node = root, parent[node]
+        return root
+
+    for node in reachable(sources):
+        parent.setdefault(id(node), id(node))
+        if isinstance(node, PowerSource):
+            for consumer in node._connections:
+                parent.setdefault(id(consumer), id(consumer))
+                parent[find(id(consumer))] = find(id(node))
+
+    groups = {}
+    for source in sources:
+        groups.setdefault(find(id(source)), []).append(source)
+    return list(groups.values())
+
+
+# Commands understood by the worker processes of a `ParallelGrid`.
+_RUN, _HISTORY, _CHARGES, _STOP = range(4)
+
+
+def _serve(connection: Connection, batch: List[dict]):
+    """Keep a batch of sub-grids inside a worker process, simulating them on request.
+
+    Each command is answered with one reply, or with the exception it raised.
+
+    Args:
+        connection: End of the pipe commands come in through and replies go out through.
+        batch: The flattened columns of each sub-grid to simulate, as built by
+            `scenario._columns()`.
+    """
+    try:
+        engines = [GridEngine(_build(columns).sources) for columns in batch]
+    except Exception as error:
+        connection.send(error)
+        return
+    connection.send(None)
+    while True:
+        command, ticks = connection.recv()
+        if command == _STOP:
+            break
+        try:
+            if command == _RUN:
+                for engine in engines:
+                    engine.run(ticks)
+                reply = [(engine.remaining(), sum(engine.charges())) for engine in engines]
+            elif command == _HISTORY:
+                reply = [([engine.tick() for _ in range(ticks)], sum(engine.charges()))
+                         for engine in engines]
+            else:
+                reply = [engine.charges() for engine in engines]
+        except Exception as error:
+            reply = error
+        connection.send(reply)
+    connection.close()
+
+
+class ParallelGrid():
+    """Simulation of a grid whose independent sub-grids are kept by worker processes.
+
+    Sub-grids are packed into one batch per worker, biggest first onto the lightest batch, so each
+    worker gets a similar amount of objects. Every worker packs its batch into `GridEngine`s once
+    and keeps them for as long as the grid is open, so simulating a block of ticks only costs a
+    round trip with the aggregates of the block. Close it, or use it as a context manager, to
+    stop the workers.
+    """
+    def __init__(self, sources: Iterable[PowerSource], max_workers: Optional[int] = None):
+        """Initialize the `ParallelGrid`, starting its workers.
+
+        Args:
+            sources: The power sources supplied on every tick, in the order they'll be supplied.
+            max_workers: Amount of worker processes. Defaults to the amount of processors.
+
+        Raises:
+            ValueError: If a source uses an allocation policy, or the grid holds a `SubGrid`.
+        """
+        sources = list(sources)
+        nodes = reachable(sources)
+        _reject_groups(nodes)
+        if any(isinstance(node, PowerSource) and node.policy() is not None for node in nodes):
+            raise ValueError('ParallelGrid only supports the default greedy allocation')
+        slots = {}
+        for slot, source in enumerate(sources):
+            slots.setdefault(id(source), []).append(slot)
+        workers = max_workers or os.cpu_count() or 1
+        sizes = [(len(reachable(group)), group) for group in components(sources)]
+        sizes.sort(key=lambda size: -size[0])
+        batches = [[] for _ in range(min(workers, len(sizes)))]
+        loads = [0] * len(batches)
+        for size, group in sizes:
+            lightest = loads.index(min(loads))
+            batches[lightest].append(group)
+            loads[lightest] += size
+        self._batches = batches
+        # Slots of the sources of each sub-grid, in the order they were given.
+        self._orders = [[[slots[id(source)].pop(0) for source in group] for group in batch]
+                        for batch in batches]
+        self._remaining = [0] * len(sources)
+        self._stored = sum(node._stored_power for node in nodes if isinstance(node, PowerBank))
+        self._connections = []
+        self._workers = []
+        self._closed = False
+        for batch in batches:
+            connection, child = Pipe()
+            # Workers get flat columns rather than the objects, whose pickling recurses once per
+            # connection and fails on long chains of banks.
+            worker = Process(target=_serve, args=(child, [_columns(group) for group in batch]),
+                             daemon=True)
+            worker.start()
+            child.close()
+            self._connections.append(connection)
+            self._workers.append(worker)
+        try:
+            self._collect()
+        except BaseException:
+            self.close()
+            raise
+
+    def __enter__(self) -> 'ParallelGrid':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _send(self, command: int, ticks: int = 0) -> List:
+        """Hand a command to every worker and wait for all of their replies.
+
+        Raises:
+            ValueError: If the grid was closed.
+        """
+        if self._closed:
+            raise ValueError('the grid is closed')
+        for connection in self._connections:
+            connection.send((command, ticks))
+        return self._collect()
+
+    def _collect(self) -> List:
+        """Wait for a reply from every worker, raising the first exception among them."""
+        replies = [connection.recv() for connection in self._connections]
+        for reply in replies:
+            if isinstance(reply, BaseException):
+                raise reply
+        return replies
+
+    def run(self, ticks: int):
+        """Advance the whole grid by the given amount of seconds.
+
+        Args:
+            ticks: Amount of seconds to simulate.
+        """
+        stored = 0
+        for order, reply in zip(self._orders, self._send(_RUN, ticks)):
+            for slots, (remaining, charge) in zip(order, reply):
+                for slot, value in zip(slots, remaining):
+                    self._remaining[slot] = value
+                stored += charge
+        self._stored = stored
+
+    def history(self, ticks: int) -> List[List[int]]:
+        """Advance the whole grid by the given amount of seconds, keeping every tick.
+
+        Args:
+            ticks: Amount of seconds to simulate.
+
+        Returns:
+            List[List[int]]: For each tick, the power remaining on each source, in the same order
+                the sources were given.
+        """
+        rows = [[0] * len(self._remaining) for _ in range(ticks)]
+        stored = 0
+        for order, reply in zip(self._orders, self._send(_HISTORY, ticks)):
+            for slots, (history, charge) in zip(order, reply):
+                for row, values in zip(rows, history):
+                    for slot, value in zip(slots, values):
+                        row[slot] = value
+                stored += charge
+        self._stored = stored
+        if rows:
+            self._remaining = list(rows[-1])
+        return rows
+
+    def remaining(self) -> List[int]:
+        """Getter for the power left over by each source on the last tick.
+
+        Returns:
+            List[int]: Remaining power per source, in the order the sources were given.
+        """
+        return list(self._remaining)
+
+    def stored(self) -> int:
+        """Getter for the energy stored in all the banks after the last tick.
+
+        Returns:
+            int: Sum of the simulated charges, measured in Joules.
+        """
+        return self._stored
+
+    def sync(self):
+        """Write the simulated charges back into the `PowerBank` objects."""
+        for batch, reply in zip(self._batches, self._send(_CHARGES)):
+            for group, charges in zip(batch, reply):
+                banks = (node for node in reachable(group) if isinstance(node, PowerBank))
+                for bank, charge in zip(banks, charges):
+                    bank._store(charge)
+
+    def close(self):
+        """Stop the workers. Simulated charges not synced yet are lost."""
+        for connection, worker in zip(self._connections, self._workers):
+            try:
+                connection.send((_STOP, 0))
+            except OSError:
+                pass
+            connection.close()
+            worker.join()
+        self._connections = []
+        self._workers = []
+        self._closed = True
+
+
+def simulate_parallel(sources: Iterable[PowerSource], ticks: int,
+                      max_workers: Optional[int] = None) -> List[List[int]]:
+    """Simulate the grid by running its independent sub-grids across worker processes.
+
+    See `ParallelGrid` for how sub-grids are spread. When done, the banks of the given grid hold
+    the simulated charges.
+
+    Args:
+        sources: The power sources supplied on every tick, in the order they'll be supplied.
+        ticks: Amount of seconds to simulate.
+        max_workers: Amount of worker processes. Defaults to the amount of processors.
+
+    Returns:
+        List[List[int]]: For each tick, the power remaining on each source, in the same order
+            the sources were given.
+
+    Raises:
+        ValueError: If a source uses an allocation policy, or the grid holds a `SubGrid`.
+    """
+    with ParallelGrid(sources, max_workers) as grid:
+        remaining = grid.history(ticks)
+        grid.sync()
+    return remaining
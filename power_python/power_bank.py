@@ -1,9 +1,13 @@
+from typing import Optional
+
 from .power_consumer import PowerConsumer
-from .power_source import PowerSource
+from .power_source import _RECEIVERS, PowerSource, PowerTotals
 
 
 class PowerBank(PowerSource, PowerConsumer):
     """An object capable of storing energy to later feed other objects."""
+    __slots__ = ('_stored_power', '_capacity', '_fleet')
+
     def __init__(self, power_input: int, power_output: int, capacity: int):
         """Initialize the `PowerBank`.
 
@@ -19,6 +23,15 @@ class PowerBank(PowerSource, PowerConsumer):
         PowerConsumer.__init__(self, power_input)
         self._stored_power = 0
         self._capacity = capacity
+        # `ChargeIndex` following the charge of this battery, if any.
+        self._fleet = None
+
+    def __getstate__(self):
+        # Copies don't belong to the fleet of the original, so they're left out of any index.
+        state = {name: getattr(self, name) for cls in type(self).__mro__
+                 for name in cls.__dict__.get('__slots__', ()) if hasattr(self, name)}
+        state['_fleet'] = None
+        return getattr(self, '__dict__', None), state
 
     def capacity(self) -> int:
         """Getter for the total capacity of the battery.
@@ -45,7 +58,8 @@ class PowerBank(PowerSource, PowerConsumer):
             int: Current output of the battery, in Watts per second. If the stored power is lower
                 than the maximum output, it'll be reflected here.
         """
-        return min([self.stored_power(), PowerSource.output(self)])
+        stored = self._stored_power
+        return stored if stored < self._output else self._output
 
     def max_output(self) -> int:
         """Getter for the mamixum output this battery is capable of.
@@ -80,8 +94,10 @@ class PowerBank(PowerSource, PowerConsumer):
                 For example, if the object's input is 100W and the supplied amount is 100W, then
                 it'll return 100%. If the supplied amount is 37W, it'll return 37%.
         """
-        if self.stored_power() < self.capacity():
-            self._stored_power += min([max([watt_amount, self.capacity() - self.stored_power()]), watt_amount])
+        if self._stored_power < self._capacity:
+            self._stored_power += watt_amount
+            if self._fleet is not None:
+                self._fleet.update(self)
         return int(watt_amount / self.input() * 100.0)
 
     def supply_power(self) -> int:
@@ -92,8 +108,119 @@ class PowerBank(PowerSource, PowerConsumer):
         Returns:
             int: Amount of power remaining after all consumers took their inputs.
         """
-        remaining = self.stored_power()
-        if self.stored_power() > 0:
-            remaining = PowerSource.supply_power(self)
-        self._stored_power -= (self.output() - remaining)
+        stored = self._stored_power
+        output = self.output()
+        remaining = self._supply(output) if stored > 0 else stored
+        self._stored_power = stored - (output - remaining)
+        if self._fleet is not None:
+            self._fleet.update(self)
         return remaining
+
+    def _store(self, charge: int):
+        """Set the charge, keeping the index following this battery up to date."""
+        self._stored_power = charge
+        if self._fleet is not None:
+            self._fleet.update(self)
+
+    def advance(self, seconds: int, inflow: int = 0) -> PowerTotals:
+        """Fast-forward the battery as if it was powered and supplied once per second.
+
+        Each second the battery receives `inflow` through `receive_power()` and then calls
+        `supply_power()`. Instead of stepping through every second, the charge path is worked out
+        from the points where the battery becomes full or runs empty. The connected consumers
+        aren't powered; only the battery's charge and the totals are updated.
+
+        Args:
+            seconds: Amount of seconds to fast-forward.
+            inflow: Power, in watts, received by the battery at the start of each second.
+
+        Returns:
+            PowerTotals: Energy taken in and handed to the connected consumers during that span.
+        """
+        demand = sum(consumer.input() for consumer in self._connections)
+        drain = min(self.max_output(), demand)
+        start = stored = self.stored_power()
+        capacity = self.capacity()
+        left = seconds
+        charging = 0
+        while left > 0:
+            if stored >= capacity:
+                if drain == 0:
+                    break
+                if capacity <= 0:
+                    stored = max(stored - left * drain, 0)
+                    break
+                steps = min(left, (stored - capacity) // drain + 1)
+                stored = max(stored - steps * drain, 0)
+                left -= steps
+                continue
+            rise = inflow - drain
+            if rise <= 0:
+                charging += left
+                stored = max(stored + left * rise, 0)
+                break
+            if capacity >= drain and stored >= capacity - drain:
+                # From here on the charge bounces inside [capacity - drain, capacity + rise),
+                # which amounts to a rotation by `rise` modulo `inflow`.
+                offset = stored - capacity + drain + left * rise
+                charging += left - offset // inflow
+                stored = capacity - drain + offset % inflow
+                break
+            if capacity >= drain:
+                steps = min(left, -((stored - capacity) // rise))
+                charging += steps
+                stored += steps * rise
+                left -= steps
+                continue
+            # The battery empties faster than it fills up: the charge still rotates by `rise`
+            # modulo `inflow`, measured from `capacity - drain`, except that whatever would
+            # go under zero is clamped to an empty battery, which then rotates again from there.
+            empty = drain - capacity
+            offset = stored + empty
+            hit = _first_below(offset, rise, inflow, empty)
+            if hit is not None and hit <= left:
+                charging += hit - (offset + hit * rise) // inflow
+                left -= hit
+                offset = empty
+                period = _first_below(empty, rise, inflow, empty)
+                if period is not None:
+                    cycles = left // period
+                    charging += cycles * (period - (empty + period * rise) // inflow)
+                    left -= cycles * period
+            charging += left - (offset + left * rise) // inflow
+            stored = (offset + left * rise) % inflow - empty
+            break
+        self._store(stored)
+        received = charging * inflow
+        return PowerTotals(received, start + received - stored)
+
+
+def _first_in(step: int, modulus: int, low: int, high: int) -> Optional[int]:
+    """Smallest `k >= 0` with `low <= k * step % modulus <= high`, in logarithmic time."""
+    if low == 0:
+        return 0
+    step %= modulus
+    if step == 0:
+        return None
+    k = (low + step - 1) // step
+    if step * k <= high:
+        return k
+    # No multiple of `step` falls in the range, so look for the amount of wraps instead.
+    wraps = _first_in(step - modulus % step, step, low % step, high % step)
+    return None if wraps is None else (low + modulus * wraps + step - 1) // step
+
+
+def _first_below(start: int, step: int, modulus: int, bound: int) -> Optional[int]:
+    """Smallest `k >= 1` with `(start + k * step) % modulus < bound`, or `None` if there's none."""
+    shift = (start + step) % modulus
+    low, high = -shift % modulus, (bound - 1 - shift) % modulus
+    if low <= high:
+        k = _first_in(step, modulus, low, high)
+    else:
+        found = [k for k in (_first_in(step, modulus, low, modulus - 1),
+                             _first_in(step, modulus, 0, high)) if k is not None]
+        k = min(found) if found else None
+    return None if k is None else k + 1
+
+
+_RECEIVERS[PowerBank.receive_power] = True
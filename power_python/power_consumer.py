@@ -1,7 +1,10 @@
+from .power_object import PowerObject
 
 
-class PowerConsumer():
+class PowerConsumer(PowerObject):
     """Base class for power consuming objects."""
+    __slots__ = ()
+
     def __init__(self, power_input: int):
         """Initialize the `PowerConsumer` object.
 
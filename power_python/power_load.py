@@ -0,0 +1,24 @@
+from .power_consumer import PowerConsumer
+from .power_source import _RECEIVERS
+
+
+class PowerLoad(PowerConsumer):
+    """A plain device that consumes whatever power it's given."""
+    __slots__ = ()
+
+    def receive_power(self, watt_amount: int) -> int:
+        """Intake power from a source.
+
+        Args:
+            watt_amount: Amount of power, in watts, this object receives during a second span.
+
+        Returns:
+            int: Rounded percentage of efficiency this object has based on the supplied power.
+                For example, if the object's input is 100W and the supplied amount is 100W, then
+                it'll return 100%. If the supplied amount is 37W, it'll return 37%.
+        """
+        power_input = self.input()
+        return int(watt_amount / power_input * 100.0) if power_input else 100
+
+
+_RECEIVERS[PowerLoad.receive_power] = False
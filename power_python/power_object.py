@@ -0,0 +1,9 @@
+class PowerObject():
+    """Common storage layout shared by every power object.
+
+    `PowerBank` is both a `PowerSource` and a `PowerConsumer`, and Python only allows a class to
+    inherit from several slotted bases when at most one of them adds fields to a shared layout.
+    The only field of consumers is declared here, so `PowerConsumer` adds nothing and the fields
+    of the supplier role live in `PowerSource`, keeping leaf devices as small as possible.
+    """
+    __slots__ = ('_input',)
@@ -1,8 +1,239 @@
+from array import array
+from bisect import bisect_left
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple, Union
+
+from .allocation import AllocationPolicy
 from .power_consumer import PowerConsumer
+from .power_object import PowerObject
+
+
+class PowerTotals(NamedTuple):
+    """Energy moved by a power object over a span of several seconds.
+
+    Attributes:
+        received: Total energy taken in from other sources, in Joules.
+        supplied: Total energy handed to the connected consumers, in Joules.
+    """
+    received: int
+    supplied: int
+
+
+class EfficiencyStats(NamedTuple):
+    """Efficiency reported by consumers, one entry per connection.
+
+    Attributes:
+        sources: Source of each connection.
+        consumers: Consumer of each connection.
+        last: Efficiency reported on the last supply.
+        minimum: Lowest efficiency reported, or 0 if never supplied.
+        mean: Average efficiency reported.
+        under: Amount of seconds the consumer reported less than 100%.
+        seconds: Amount of seconds the consumer was supplied.
+    """
+    sources: List
+    consumers: List
+    last: array
+    minimum: array
+    mean: array
+    under: array
+    seconds: array
+
+
+# Per connection counters: last, minimum, total and under 100% efficiency, and supplied seconds.
+# The last two fields are bookkeeping of `_DemandIndex`.
+_STATS = array('q', [0, 2 ** 63 - 1, 0, 0, 0, 0, 0])
+
+# `receive_power()` implementations whose result is known when the consumer gets its whole input or
+# nothing at all, mapped to whether they still have to be called when given their whole input.
+# Each module registers its own classes.
+_RECEIVERS: Dict = {}
+
+
+def _receiver(consumer: PowerConsumer) -> Optional[bool]:
+    """Whether a consumer has to be powered when fed, or `None` if it always has to."""
+    cls = type(consumer)
+    if cls.input is not PowerConsumer.input:
+        return None
+    called = _RECEIVERS.get(cls.receive_power)
+    if called is None or consumer.input() < 0 or called and consumer.input() == 0:
+        return None
+    return called
+
+
+def _prefix(tree: array, position: int) -> int:
+    """Sum of the first `position` values held by a Fenwick tree."""
+    total = 0
+    while position:
+        total += tree[position]
+        position -= position & -position
+    return total
+
+
+def _grow(tree: array, value: int):
+    """Add a value after the last one held by a Fenwick tree."""
+    node = len(tree)
+    tree.append(value + _prefix(tree, node - 1) - _prefix(tree, node - (node & -node)))
+
+
+class _DemandIndex():
+    """Demand of the consumers of a source, searched to find where its power runs out.
+
+    On each tick, consumers before the cutoff get their whole input and consumers after it get
+    nothing. Neither is powered unless `_RECEIVERS` says so, and their counters are only brought
+    up to date when they're read: a Fenwick tree counts the ticks by cutoff, so the ticks a
+    consumer went without power are found in logarithmic time. The inputs are held by another
+    Fenwick tree, so the cutoff is found and consumers are removed in logarithmic time as well;
+    a removed consumer leaves an empty slot behind.
+    """
+    def __init__(self):
+        # `None` in the slots of the removed consumers.
+        self.consumers = []
+        self.offsets = array('q')
+        self.inputs = array('q')
+        self.demand = array('q', [0])
+        self.called = array('q')
+        self.positions = {}
+        self.cuts = array('q', [0, 0])
+        self.ticks = 0
+        self.settled = 0
+        self.last_cut = 0
+        self.removed = 0
+
+    @classmethod
+    def build(cls, source: 'PowerSource') -> Tuple['_DemandIndex', Optional[PowerConsumer]]:
+        """Index the consumers of a source, stopping at the first one that has to be powered.
+
+        Returns:
+            Tuple[_DemandIndex, Optional[PowerConsumer]]: The index and the consumer that kept
+                it from being built, or `None` if every consumer was indexed.
+        """
+        index = cls()
+        for consumer, offset in source._connections.items():
+            if not index.append(consumer, offset, source._stats):
+                return index, consumer
+        return index, None
+
+    def append(self, consumer: PowerConsumer, offset: int, stats: array) -> bool:
+        """Add a consumer after the rest, returning `False` if it has to be powered."""
+        called = _receiver(consumer)
+        if called is None:
+            return False
+        position = len(self.consumers)
+        power_input = consumer.input()
+        self.consumers.append(consumer)
+        self.offsets.append(offset)
+        self.inputs.append(power_input)
+        _grow(self.demand, power_input)
+        if called:
+            self.called.append(position)
+        self.positions[consumer] = position
+        # Room for counting ticks with the new cutoff, after every consumer.
+        _grow(self.cuts, 0)
+        stats[offset + 5] = self.ticks
+        stats[offset + 6] = self._starved(position)
+        return True
+
+    def remove(self, consumer: PowerConsumer, stats: array):
+        """Empty the slot of a consumer, after bringing its counters up to date."""
+        position = self.positions.pop(consumer)
+        self.settle(position, stats)
+        power_input = self.inputs[position]
+        demand = self.demand
+        node = position + 1
+        while node < len(demand):
+            demand[node] -= power_input
+            node += node & -node
+        self.inputs[position] = 0
+        self.consumers[position] = None
+        index = bisect_left(self.called, position)
+        if index < len(self.called) and self.called[index] == position:
+            del self.called[index]
+        self.removed += 1
+
+    def _starved(self, position: int) -> int:
+        """Amount of ticks whose cutoff was before the given position."""
+        return _prefix(self.cuts, position)
+
+    def supply(self, source: 'PowerSource', power: int) -> int:
+        """Hand out the given power, returning what's left."""
+        demand = self.demand
+        inputs = self.inputs
+        consumers = self.consumers
+        called = self.called
+        size = len(consumers)
+        # Walk down the tree for the most consumers whose demand adds up to the power at most.
+        cut = 0
+        remaining = power
+        step = 1 << size.bit_length() >> 1
+        while step:
+            node = cut + step
+            if node <= size and demand[node] <= remaining:
+                cut = node
+                remaining -= demand[node]
+            step >>= 1
+        # Only reached with negative power, which goes to the first consumer left.
+        while cut < size and consumers[cut] is None:
+            cut += 1
+        for index in range(bisect_left(called, cut)):
+            position = called[index]
+            consumers[position].receive_power(inputs[position])
+        if cut < size:
+            stats = source._stats
+            self.settle(cut, stats)
+            offset = self.offsets[cut]
+            efficiency = consumers[cut].receive_power(remaining)
+            stats[offset] = efficiency
+            if efficiency < stats[offset + 1]:
+                stats[offset + 1] = efficiency
+            stats[offset + 2] += efficiency
+            if efficiency < 100:
+                stats[offset + 3] += 1
+            stats[offset + 4] += 1
+            stats[offset + 5] += 1
+            remaining = 0
+        node = cut + 1
+        cuts = self.cuts
+        while node < len(cuts):
+            cuts[node] += 1
+            node += node & -node
+        self.ticks += 1
+        self.last_cut = cut
+        return remaining
+
+    def settle(self, position: int, stats: array):
+        """Bring the counters of a consumer up to date."""
+        offset = self.offsets[position]
+        pending = self.ticks - stats[offset + 5]
+        if pending <= 0:
+            return
+        starved = self._starved(position) - stats[offset + 6]
+        fed = pending - starved
+        hungry = 0 if self.inputs[position] else 100
+        stats[offset] = 100 if self.last_cut > position else hungry
+        if fed and 100 < stats[offset + 1]:
+            stats[offset + 1] = 100
+        if starved and hungry < stats[offset + 1]:
+            stats[offset + 1] = hungry
+        stats[offset + 2] += 100 * fed + hungry * starved
+        if hungry < 100:
+            stats[offset + 3] += starved
+        stats[offset + 4] += pending
+        stats[offset + 5] = self.ticks
+        stats[offset + 6] += starved
 
+    def settle_all(self, stats: array):
+        """Bring the counters of every consumer up to date."""
+        if self.settled != self.ticks:
+            for position in self.positions.values():
+                self.settle(position, stats)
+            self.settled = self.ticks
 
-class PowerSource():
+
+class PowerSource(PowerObject):
     """A power supplier class."""
+    __slots__ = ('_output', '_connections', '_stats', '_free_stats', '_policy', '_index',
+                 '_blocker')
+
     def __init__(self, power_output: int):
         """Initialize the `PowerSource`.
 
@@ -10,7 +241,15 @@ class PowerSource():
             power_output: Total amount of watts per second expended by the power source.
         """
         self._output = power_output
-        self._connections = []
+        # Keys keep the connection order, which is the order consumers get supplied in. Values are
+        # the offset of each connection's counters in `_stats`.
+        self._connections = {}
+        self._stats = array('q')
+        self._free_stats = []
+        self._policy = None
+        # Built on the first tick that can use it; `False` while `_blocker` has to be powered.
+        self._index = None
+        self._blocker = None
 
     def output(self) -> int:
         """Getter for the maximum supplied power.
@@ -31,19 +270,203 @@ class PowerSource():
                 connected.
         """
         if consumer not in self._connections:
-            self._connections.append(consumer)
+            if self._free_stats:
+                offset = self._free_stats.pop()
+                self._stats[offset:offset + len(_STATS)] = _STATS
+            else:
+                offset = len(self._stats)
+                self._stats.extend(_STATS)
+            self._connections[consumer] = offset
+            if self._index and not self._index.append(consumer, offset, self._stats):
+                self._drop_index()
+                self._index = False
+                self._blocker = consumer
+            return True
+        return False
+
+    def connect_many(self, consumers: Iterable[PowerConsumer]) -> int:
+        """Connects all the given `PowerConsumer`s into this source's network, in order.
+
+        Args:
+            consumers: The objects that will start consuming from this supplier.
+
+        Returns:
+            int: Amount of objects that were connected, leaving out the ones that were already
+                connected or that `connect()` rejected.
+        """
+        connect = self.connect
+        return sum(1 for consumer in consumers if connect(consumer))
+
+    def disconnect(self, consumer: PowerConsumer) -> bool:
+        """Removes the given `PowerConsumer` from this source's network.
+
+        Args:
+            consumer: The object that will stop consuming from this supplier.
+
+        Returns:
+            bool: `True` if it was disconnected successfully, `False` if the object wasn't
+                connected.
+        """
+        if consumer in self._connections:
+            index = self._index
+            if index:
+                index.remove(consumer, self._stats)
+                # Compact the index once most of it is empty slots.
+                if 2 * index.removed > len(index.consumers):
+                    self._drop_index()
+            self._free_stats.append(self._connections.pop(consumer))
             return True
         return False
 
+    def is_connected(self, consumer: PowerConsumer) -> bool:
+        """Checks whether the given `PowerConsumer` is part of this source's network.
+
+        Args:
+            consumer: The object to look for.
+
+        Returns:
+            bool: `True` if the object consumes from this supplier.
+        """
+        return consumer in self._connections
+
+    def policy(self) -> Optional[AllocationPolicy]:
+        """Getter for the way the output is split among the consumers.
+
+        Returns:
+            Optional[AllocationPolicy]: The policy in use, or `None` for the default greedy
+                allocation in connection order.
+        """
+        return self._policy
+
+    def set_policy(self, policy: Optional[AllocationPolicy]):
+        """Change the way the output is split among the consumers.
+
+        Args:
+            policy: The policy to use, or `None` to go back to the default greedy allocation.
+        """
+        self._drop_index()
+        self._policy = policy
+
     def supply_power(self) -> int:
         """Distribute the power output among the connected consumers during one second.
 
+        By default consumers are served greedily in connection order; see `set_policy()`. The
+        greedy allocation keeps the cumulative demand of the consumers, so the consumer where the
+        power runs out is found in logarithmic time. Plain loads before and after it aren't
+        called, since they'd report 100% and 0%, and banks are only powered when they get their
+        input, so ticking a source costs as much as the banks it feeds. Consumers of other
+        classes, or that change their input on their own, are always powered.
+
+        Returns:
+            int: Amount of power remaining after all consumers took their inputs.
+        """
+        return self._supply(self.output())
+
+    def _supply(self, remaining_power: int) -> int:
+        """Hand out the given power among the connected consumers, updating their counters.
+
+        The greedy paths don't allocate anything, so ticking a grid doesn't churn memory.
+
+        Args:
+            remaining_power: Amount of watts available for this second.
+
         Returns:
             int: Amount of power remaining after all consumers took their inputs.
         """
-        remaining_power = self.output()
-        for consumer in self._connections:
-            supply = min([remaining_power, consumer.input()])
-            consumer.receive_power(supply)
+        if self._policy is None:
+            index = self._index
+            # The consumer that kept the index from being built may have been disconnected or
+            # swapped its methods back since.
+            if index is None or index is False and (
+                    self._blocker not in self._connections
+                    or _receiver(self._blocker) is not None):
+                index = self._build_index()
+            if index:
+                return index.supply(self, remaining_power)
+        stats = self._stats
+        supplies = None
+        if self._policy is not None:
+            consumers = list(self._connections)
+            supplies = iter(self._policy.allocate(
+                remaining_power, [consumer.input() for consumer in consumers], consumers))
+        for consumer, offset in self._connections.items():
+            if supplies is None:
+                supply = consumer.input()
+                if remaining_power < supply:
+                    supply = remaining_power
+            else:
+                supply = next(supplies)
+            efficiency = consumer.receive_power(supply)
+            stats[offset] = efficiency
+            if efficiency < stats[offset + 1]:
+                stats[offset + 1] = efficiency
+            stats[offset + 2] += efficiency
+            if efficiency < 100:
+                stats[offset + 3] += 1
+            stats[offset + 4] += 1
             remaining_power -= supply
         return remaining_power
+
+    def efficiency(self, consumer: PowerConsumer) -> int:
+        """Getter for the efficiency a consumer reported on the last supply from this source.
+
+        Args:
+            consumer: An object connected to this source.
+
+        Returns:
+            int: Rounded percentage returned by the consumer's `receive_power()`, or 0 if it
+                wasn't supplied yet.
+        """
+        offset = self._connections[consumer]
+        if self._index:
+            self._index.settle(self._index.positions[consumer], self._stats)
+        return self._stats[offset]
+
+    def efficiency_stats(self) -> EfficiencyStats:
+        """Efficiency counters of every consumer connected to this source.
+
+        Returns:
+            EfficiencyStats: One entry per connected consumer, in supply order.
+        """
+        self._settle()
+        stats = self._stats
+        offsets = list(self._connections.values())
+        seconds = array('q', [stats[offset + 4] for offset in offsets])
+        return EfficiencyStats(
+            [self] * len(offsets), list(self._connections),
+            array('q', [stats[offset] for offset in offsets]),
+            array('q', [stats[offset + 1] if stats[offset + 4] else 0 for offset in offsets]),
+            array('d', [stats[offset + 2] / stats[offset + 4] if stats[offset + 4] else 0.0
+                        for offset in offsets]),
+            array('q', [stats[offset + 3] for offset in offsets]),
+            seconds)
+
+    def _settle(self):
+        """Bring the counters of every connection up to date."""
+        if self._index:
+            self._index.settle_all(self._stats)
+
+    def _build_index(self) -> Union['_DemandIndex', bool]:
+        """Index the consumers, or remember which one has to be powered."""
+        index, self._blocker = _DemandIndex.build(self)
+        self._index = index if self._blocker is None else False
+        return self._index
+
+    def _drop_index(self):
+        """Stop using the cumulative demand until the next tick rebuilds it."""
+        self._settle()
+        self._index = None
+
+    def advance(self, seconds: int) -> PowerTotals:
+        """Compute, in constant time, what calling `supply_power()` every second would deliver.
+
+        The connected consumers aren't powered; only the totals are worked out.
+
+        Args:
+            seconds: Amount of seconds to fast-forward.
+
+        Returns:
+            PowerTotals: Energy handed to the connected consumers during that span.
+        """
+        demand = sum(consumer.input() for consumer in self._connections)
+        return PowerTotals(0, min(self.output(), demand) * seconds)
@@ -0,0 +1,139 @@
+from array import array
+from collections import Counter
+from typing import Iterable, Sequence, Tuple
+
+from .power_load import PowerLoad
+
+
+class DemandProfiles():
+    """Shared set of demand curves, indexed by tick, and the clock selecting their current value.
+
+    Consumers following a profile only keep the index of their curve, so moving the clock costs
+    one lookup per curve, no matter how many consumers follow each of them.
+    """
+    def __init__(self):
+        """Initialize an empty set of profiles, with the clock at tick 0."""
+        self._curves = []
+        self._current = array('q')
+        self._tick = 0
+
+    def add(self, demand: Sequence[int]) -> int:
+        """Register a demand curve given second by second. It repeats once it's over.
+
+        Args:
+            demand: Watts demanded on each tick.
+
+        Returns:
+            int: Index of the profile, to be used by the consumers following it.
+        """
+        curve = array('q', demand)
+        self._curves.append(curve)
+        self._current.append(curve[self._tick % len(curve)])
+        return len(self._curves) - 1
+
+    def add_piecewise(self, steps: Iterable[Tuple[int, int]], period: int) -> int:
+        """Register a demand curve that changes at given ticks. It repeats every `period` ticks.
+
+        Args:
+            steps: `(tick, watts)` pairs, sorted by tick, giving the demand from that tick on.
+                The first step's demand applies from tick 0.
+            period: Length of the curve, in ticks.
+
+        Returns:
+            int: Index of the profile, to be used by the consumers following it.
+        """
+        steps = list(steps)
+        steps[0] = (0, steps[0][1])
+        curve = array('q')
+        for (start, watts), (end, _) in zip(steps, steps[1:] + [(period, 0)]):
+            curve.extend(array('q', [watts]) * (end - start))
+        return self.add(curve)
+
+    def tick(self) -> int:
+        """Getter for the tick the profiles are currently at.
+
+        Returns:
+            int: Current tick.
+        """
+        return self._tick
+
+    def set_tick(self, tick: int):
+        """Move the clock, updating the current demand of every profile.
+
+        Args:
+            tick: The tick to move to.
+        """
+        self._tick = tick
+        current = self._current
+        for index, curve in enumerate(self._curves):
+            current[index] = curve[tick % len(curve)]
+
+    def advance(self):
+        """Move the clock one tick forward."""
+        self.set_tick(self._tick + 1)
+
+    def demand(self, profile: int) -> int:
+        """Getter for the current demand of a profile.
+
+        Args:
+            profile: Index of the profile.
+
+        Returns:
+            int: Watts demanded on the current tick.
+        """
+        return self._current[profile]
+
+    def total_demand(self, loads: Iterable['ProfileLoad'], start: int, stop: int) -> array:
+        """Aggregate demand of many consumers over a span of ticks.
+
+        Consumers are only counted per profile, so the cost depends on the amount of profiles
+        and ticks rather than on the amount of consumers.
+
+        Args:
+            loads: Consumers following profiles of this set.
+            start: First tick of the span.
+            stop: Tick to stop at, not included.
+
+        Returns:
+            array: Total watts demanded on each tick of the span.
+        """
+        counts = Counter(load._profile for load in loads)
+        total = array('q', bytes(8 * (stop - start)))
+        for profile, count in counts.items():
+            curve = self._curves[profile]
+            length = len(curve)
+            offset = start % length
+            # Lay the curve over the span, repeated as many times as needed.
+            repeated = (curve[offset:] + curve * ((stop - start) // length + 1))[:stop - start]
+            for index, value in enumerate(repeated):
+                total[index] += count * value
+        return total
+
+
+class ProfileLoad(PowerLoad):
+    """A device whose demand follows one of the curves of a `DemandProfiles` set.
+
+    It plugs into `PowerSource.supply_power()` like any other consumer, since its `input()`
+    always reports the demand of the current tick. Engines that read inputs once, such as
+    `GridEngine`, won't follow the changes.
+    """
+    __slots__ = ('_profiles', '_profile')
+
+    def __init__(self, profiles: DemandProfiles, profile: int):
+        """Initialize the `ProfileLoad`.
+
+        Args:
+            profiles: The set holding the curve and the clock.
+            profile: Index of the curve to follow.
+        """
+        PowerLoad.__init__(self, 0)
+        self._profiles = profiles
+        self._profile = profile
+
+    def input(self) -> int:
+        """Getter for the power intake on the current tick.
+
+        Returns:
+            int: Amount of watts per second the current object consumes.
+        """
+        return self._profiles._current[self._profile]
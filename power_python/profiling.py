@@ -0,0 +1,175 @@
+import functools
+import time
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from .power_bank import PowerBank
+from .power_load import PowerLoad
+from .power_object import PowerObject
+from .power_source import PowerSource
+
+# Methods instrumented by default. Subclasses that don't override them are covered as well.
+TARGETS = ((PowerSource, 'supply_power'), (PowerBank, 'supply_power'),
+           (PowerBank, 'receive_power'), (PowerLoad, 'receive_power'))
+
+
+class ProfileEntry(NamedTuple):
+    """What a profiled method did on one node.
+
+    Attributes:
+        node: The power object the method was called on.
+        method: Name of the method.
+        calls: Amount of calls.
+        nanoseconds: Time spent inside the calls, including the calls they made.
+        energy: Joules handed to consumers by `supply_power()`, or taken in by `receive_power()`.
+    """
+    node: PowerObject
+    method: str
+    calls: int
+    nanoseconds: int
+    energy: int
+
+
+class Profiler():
+    """Opt-in instrumentation of the supply and receive methods of power objects.
+
+    Enabling it swaps the instrumented methods of the classes for timed wrappers and disabling it
+    puts the originals back, so there's no cost at all while it's disabled. Only one profiler can
+    be enabled at a time. Engines that don't call these methods, such as `GridEngine`, aren't
+    profiled, and neither are the calls sources skip when their outcome is known (see
+    `PowerSource.supply_power()`).
+    """
+    _enabled = None
+
+    def __init__(self, targets: Sequence[Tuple[type, str]] = TARGETS,
+                 names: Optional[Dict[PowerObject, str]] = None):
+        """Initialize the `Profiler`.
+
+        Args:
+            targets: `(class, method name)` pairs to instrument. Each method must be defined by
+                the class itself.
+            names: Labels for the nodes in reports. Other nodes are labeled by their class and
+                the order they were first seen in.
+        """
+        self._targets = list(targets)
+        self._names = dict(names or {})
+        self._originals = []
+        self._entries = {}
+        self._folded = {}
+        self._stack = []
+        self._children = []
+
+    def __enter__(self) -> 'Profiler':
+        self.enable()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.disable()
+
+    def enable(self):
+        """Start instrumenting the target methods.
+
+        Raises:
+            RuntimeError: If a profiler is already enabled.
+        """
+        if Profiler._enabled is not None:
+            raise RuntimeError('a profiler is already enabled')
+        Profiler._enabled = self
+        for cls, method in self._targets:
+            original = cls.__dict__[method]
+            self._originals.append((cls, method, original))
+            setattr(cls, method, self._wrap(original, method))
+
+    def disable(self):
+        """Put the original methods back. Recorded data is kept."""
+        for cls, method, original in reversed(self._originals):
+            setattr(cls, method, original)
+        self._originals = []
+        if Profiler._enabled is self:
+            Profiler._enabled = None
+
+    def name(self, node: PowerObject) -> str:
+        """Label of a node in reports.
+
+        Args:
+            node: A power object.
+
+        Returns:
+            str: The given name, or the class name followed by the order the node was seen in.
+        """
+        name = self._names.get(node)
+        if name is None:
+            name = self._names[node] = f'{type(node).__name__}#{len(self._names)}'
+        return name
+
+    def _wrap(self, function: Callable, method: str) -> Callable:
+        """Build the timed replacement of a method."""
+        entries, folded = self._entries, self._folded
+        stack, children = self._stack, self._children
+        supplying = method == 'supply_power'
+        clock = time.perf_counter_ns
+
+        @functools.wraps(function)
+        def wrapper(node, *args):
+            power = node.output() if supplying else args[0]
+            stack.append(f'{self.name(node)}.{method}')
+            children.append(0)
+            start = clock()
+            try:
+                result = function(node, *args)
+            finally:
+                elapsed = clock() - start
+                path = ';'.join(stack)
+                folded[path] = folded.get(path, 0) + elapsed - children.pop()
+                stack.pop()
+                if children:
+                    children[-1] += elapsed
+            entry = entries.get((node, method))
+            if entry is None:
+                entry = entries[(node, method)] = [0, 0, 0]
+            entry[0] += 1
+            entry[1] += elapsed
+            entry[2] += power - result if supplying else power
+            return result
+        return wrapper
+
+    def entries(self) -> List[ProfileEntry]:
+        """What every profiled method did on every node.
+
+        Returns:
+            List[ProfileEntry]: One entry per node and method, the most time consuming first.
+        """
+        entries = [ProfileEntry(node, method, *values)
+                   for (node, method), values in self._entries.items()]
+        entries.sort(key=lambda entry: entry.nanoseconds, reverse=True)
+        return entries
+
+    def report(self, limit: Optional[int] = None) -> str:
+        """Human readable table of the hot spots.
+
+        Args:
+            limit: Amount of rows to show. All of them by default.
+
+        Returns:
+            str: One row per node and method, the most time consuming first.
+        """
+        rows = [f'{"node":<24} {"method":<14} {"calls":>10} {"ms":>10} {"us/call":>9} '
+                f'{"energy":>14}']
+        for entry in self.entries()[:limit]:
+            rows.append(f'{self.name(entry.node):<24} {entry.method:<14} {entry.calls:>10} '
+                        f'{entry.nanoseconds / 1e6:>10.3f} '
+                        f'{entry.nanoseconds / entry.calls / 1e3:>9.3f} {entry.energy:>14}')
+        return '\n'.join(rows)
+
+    def write_folded(self, path: str):
+        """Write the time spent on each call stack in the folded format of flame graph tools.
+
+        Each line holds the nodes and methods of a stack, separated by `;`, and the nanoseconds
+        spent in its last call without counting the calls it made. `flamegraph.pl` and
+        speedscope read it directly.
+
+        Args:
+            path: File to write.
+        """
+        with open(path, 'w') as file:
+            for stack, nanoseconds in sorted(self._folded.items()):
+                file.write(f'{stack} {nanoseconds}\n')
@@ -0,0 +1,111 @@
+import asyncio
+from typing import Awaitable, Callable, Iterable, List, Optional
+
+from .power_source import PowerSource
+
+
+class RealTimeClock():
+    """Drives the supply of many sources at wall-clock rate from a single asyncio event loop.
+
+    Every tick supplies all the sources in one pass, so there's a single timer no matter how
+    many sources there are. Ticks are scheduled against absolute deadlines, so a late tick
+    doesn't push the following ones back.
+    """
+    def __init__(self, sources: Iterable[PowerSource], speedup: float = 1.0):
+        """Initialize the `RealTimeClock`.
+
+        Args:
+            sources: The power sources supplied on every tick, in the order they'll be supplied.
+            speedup: Simulated seconds per wall-clock second.
+        """
+        self._sources = list(sources)
+        self._speedup = speedup
+        self._hooks = []
+        self._waiters = []
+        self._tick = 0
+        self._running = False
+        self._max_lateness = 0.0
+        self._total_lateness = 0.0
+        self._ticks_run = 0
+
+    def tick(self) -> int:
+        """Getter for the amount of ticks run so far.
+
+        Returns:
+            int: Simulated seconds since the clock was created.
+        """
+        return self._tick
+
+    def add_hook(self, hook: Callable[[int, List[int]], Awaitable[None]]):
+        """Register a coroutine function awaited after every tick.
+
+        Hooks of the same tick run concurrently, and the next tick waits for them.
+
+        Args:
+            hook: Receives the tick number and the power remaining on each source.
+        """
+        self._hooks.append(hook)
+
+    def next_tick(self) -> Awaitable[int]:
+        """Wait for the next tick to be run.
+
+        Returns:
+            Awaitable[int]: Resolves to the number of the tick once it's done.
+        """
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        return waiter
+
+    def max_lateness(self) -> float:
+        """Getter for the worst delay of a tick start relative to its deadline.
+
+        Returns:
+            float: Seconds of delay of the most delayed tick run by the last `run()`.
+        """
+        return self._max_lateness
+
+    def mean_lateness(self) -> float:
+        """Getter for the average delay of tick starts relative to their deadlines.
+
+        Returns:
+            float: Average seconds of delay of the ticks run by the last `run()`.
+        """
+        return self._total_lateness / self._ticks_run if self._ticks_run else 0.0
+
+    def stop(self):
+        """Make `run()` return after the tick in progress."""
+        self._running = False
+
+    async def run(self, ticks: Optional[int] = None):
+        """Run ticks at wall-clock rate until stopped.
+
+        Args:
+            ticks: Amount of ticks to run. Runs until `stop()` is called when not given.
+        """
+        loop = asyncio.get_running_loop()
+        period = 1.0 / self._speedup
+        start = loop.time()
+        self._running = True
+        self._max_lateness = self._total_lateness = 0.0
+        self._ticks_run = 0
+        while self._running and (ticks is None or self._ticks_run < ticks):
+            deadline = start + self._ticks_run * period
+            delay = deadline - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            else:
+                # Behind schedule: still let the other tasks of the loop run between ticks.
+                await asyncio.sleep(0)
+            lateness = max(loop.time() - deadline, 0.0)
+            self._max_lateness = max(self._max_lateness, lateness)
+            self._total_lateness += lateness
+            remaining = [source.supply_power() for source in self._sources]
+            self._tick += 1
+            self._ticks_run += 1
+            waiters, self._waiters = self._waiters, []
+            for waiter in waiters:
+                if not waiter.done():
+                    waiter.set_result(self._tick)
+            if self._hooks:
+                await asyncio.gather(*(hook(self._tick, remaining) for hook in self._hooks))
+        self._running = False
@@ -0,0 +1,138 @@
+import mmap
+from array import array
+from typing import Iterable, List, Optional
+
+from .power_bank import PowerBank
+from .power_consumer import PowerConsumer
+from .power_source import PowerSource
+
+
+class Recorder():
+    """Per-tick history of a set of power objects, kept in fixed-size columns.
+
+    Three columns are recorded for each device: `stored_power` (banks), `output` (sources) and
+    `efficiency` (consumers, as reported to the first recorded source feeding them), leaving 0
+    where a value doesn't apply. Every column is a ring buffer holding the last `capacity`
+    samples, either in memory or memory-mapped from a file so long runs live on disk rather than
+    in RAM. The columns can be read through `memoryview`s, which `numpy.asarray()` wraps without
+    copying.
+    """
+    COLUMNS = ('stored_power', 'output', 'efficiency')
+
+    def __init__(self, devices: Iterable[PowerConsumer], capacity: int,
+                 path: Optional[str] = None, every: int = 1, typecode: str = 'q'):
+        """Initialize the `Recorder`.
+
+        Args:
+            devices: The power objects to record.
+            capacity: Amount of samples kept per column. Older samples get overwritten.
+            path: File to memory-map the columns from. It's created or truncated. The columns are
+                kept in memory when not given.
+            every: Downsampling factor: only one every `every` ticks is sampled.
+            typecode: `array` type code of the stored values.
+        """
+        self._devices = list(devices)
+        self._capacity = capacity
+        self._every = every
+        self._typecode = typecode
+        self._ticks = 0
+        self._samples = 0
+        self._feeders = {}
+        for device in self._devices:
+            if isinstance(device, PowerSource):
+                for consumer in device._connections:
+                    self._feeders.setdefault(id(consumer), device)
+
+        size = len(self.COLUMNS) * capacity * len(self._devices) * array(typecode).itemsize
+        self._file = None
+        if path is None:
+            self._buffer = bytearray(size)
+        else:
+            self._file = open(path, 'w+b')
+            self._file.truncate(size)
+            self._buffer = mmap.mmap(self._file.fileno(), size) if size else bytearray()
+        self._view = memoryview(self._buffer).cast(typecode)
+
+    def samples(self) -> int:
+        """Getter for the amount of samples taken so far.
+
+        Returns:
+            int: Samples taken, including the ones that were already overwritten.
+        """
+        return self._samples
+
+    def oldest(self) -> int:
+        """Getter for the row holding the oldest sample still kept.
+
+        Returns:
+            int: Index of the oldest row in the columns; rows wrap around from there.
+        """
+        return self._samples % self._capacity if self._samples > self._capacity else 0
+
+    def record(self):
+        """Account for one tick, sampling the devices if it's due."""
+        self._ticks += 1
+        if (self._ticks - 1) % self._every:
+            return
+        count = len(self._devices)
+        row = self._samples % self._capacity
+        stride = self._capacity * count
+        start = row * count
+        self._view[start:start + count] = array(self._typecode, [
+            device._stored_power if isinstance(device, PowerBank) else 0
+            for device in self._devices])
+        start += stride
+        self._view[start:start + count] = array(self._typecode, [
+            device.output() if isinstance(device, PowerSource) else 0
+            for device in self._devices])
+        start += stride
+        self._view[start:start + count] = array(self._typecode, [
+            self._efficiency(device) for device in self._devices])
+        self._samples += 1
+
+    def _efficiency(self, device: PowerConsumer) -> int:
+        """Efficiency last reported by a device to its recorded feeder, if any."""
+        feeder = self._feeders.get(id(device))
+        return feeder.efficiency(device) if feeder is not None else 0
+
+    def column(self, name: str) -> memoryview:
+        """Zero-copy view over one of the recorded columns.
+
+        Args:
+            name: One of `COLUMNS`.
+
+        Returns:
+            memoryview: Two-dimensional view, one row per kept sample (starting at `oldest()`
+                once the buffer wrapped around) and one column per device.
+        """
+        count = len(self._devices)
+        rows = min(self._samples, self._capacity)
+        start = self.COLUMNS.index(name) * self._capacity * count
+        view = self._view[start:start + rows * count]
+        return view.cast('B').cast(self._typecode, [rows, count]) if count else view
+
+    def history(self, name: str, device: PowerConsumer) -> List[int]:
+        """Kept samples of one device, from the oldest to the newest.
+
+        Args:
+            name: One of `COLUMNS`.
+            device: One of the recorded devices.
+
+        Returns:
+            List[int]: Recorded values of `device`, in chronological order.
+        """
+        index = self._devices.index(device)
+        count = len(self._devices)
+        rows = min(self._samples, self._capacity)
+        start = self.COLUMNS.index(name) * self._capacity * count
+        values = self._view[start + index:start + rows * count:count].tolist()
+        oldest = self.oldest()
+        return values[oldest:] + values[:oldest]
+
+    def close(self):
+        """Release the columns and the backing file, if any."""
+        self._view.release()
+        if self._file is not None:
+            if isinstance(self._buffer, mmap.mmap):
+                self._buffer.close()
+            self._file.close()
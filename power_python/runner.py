@@ -0,0 +1,135 @@
+"""Streaming simulation of a grid described by a scenario file.
+
+The grid is simulated for a number of ticks with the chosen engine, and a row of aggregates is
+written every `--every` ticks as soon as it's computed, so memory use doesn't grow with the amount
+of ticks and the output can be piped into other tools.
+
+Run it with `python -m power_python --help`.
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+from typing import Iterator, TextIO, Tuple
+
+from .flow import FlowSolver
+from .grid_engine import GridEngine
+from .partition import ParallelGrid
+from .power_bank import PowerBank
+from .scenario import Scenario, load
+
+ENGINES = ('objects', 'grid', 'flow')
+FIELDS = ('tick', 'remaining', 'stored')
+
+
+def simulate(scenario: Scenario, ticks: int, every: int = 1, engine: str = 'objects',
+             workers: int = 1) -> Iterator[Tuple[int, int, int]]:
+    """Simulate a grid, yielding its aggregates as the simulation goes.
+
+    Args:
+        scenario: The grid to simulate. Its banks hold the simulated charges afterwards.
+        ticks: Amount of seconds to simulate.
+        every: Amount of ticks between rows. The last row is always the last tick.
+        engine: `objects` calls `supply_power()` on each source in order, `grid` packs the grid
+            into a `GridEngine` and `flow` allocates the whole grid with a `FlowSolver`.
+        workers: Amount of processes the independent sub-grids are spread across. With more than
+            one, the processes keep their sub-grids for the whole run and only send back the
+            aggregates of each block of `every` ticks.
+
+    Yields:
+        Tuple[int, int, int]: The tick, the power the sources had left over on it and the energy
+            stored in all the banks after it.
+
+    Raises:
+        ValueError: If several workers are asked for an engine other than `grid`.
+    """
+    if workers > 1 and engine != 'grid':
+        raise ValueError('only the grid engine runs on several workers')
+    sources = scenario.sources
+    banks = [node for node in scenario.nodes if isinstance(node, PowerBank)]
+    tick = 0
+    if engine == 'grid' and workers == 1:
+        grid = GridEngine(sources)
+        while tick < ticks:
+            block = min(every, ticks - tick)
+            grid.run(block)
+            tick += block
+            yield tick, sum(grid.remaining()), sum(grid.charges())
+        grid.sync()
+        return
+    if engine == 'grid':
+        with ParallelGrid(sources, workers) as grid:
+            while tick < ticks:
+                block = min(every, ticks - tick)
+                grid.run(block)
+                tick += block
+                yield tick, sum(grid.remaining()), grid.stored()
+            grid.sync()
+        return
+    if engine == 'flow':
+        step = FlowSolver(sources).tick
+    else:
+        def step():
+            return [source.supply_power() for source in sources]
+    while tick < ticks:
+        block = min(every, ticks - tick)
+        for _ in range(block):
+            remaining = step()
+        tick += block
+        yield tick, sum(remaining), sum(bank._stored_power for bank in banks)
+
+
+def write(rows: Iterator[Tuple[int, ...]], file: TextIO, output_format: str = 'csv'):
+    """Write rows of aggregates one at a time.
+
+    Args:
+        rows: The rows, with the values of `FIELDS`.
+        file: Text file to write them to.
+        output_format: `csv`, with a header, or `jsonl` for a JSON object per line.
+    """
+    if output_format == 'csv':
+        writer = csv.writer(file)
+        writer.writerow(FIELDS)
+        for row in rows:
+            writer.writerow(row)
+    else:
+        for row in rows:
+            file.write(json.dumps(dict(zip(FIELDS, row))) + '\n')
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m power_python',
+                                     description=__doc__.splitlines()[0])
+    parser.add_argument('grid', help='Scenario file, JSON if it ends in .json or columnar.')
+    parser.add_argument('--ticks', type=int, required=True, help='Amount of seconds to simulate.')
+    parser.add_argument('--engine', choices=ENGINES, default='objects',
+                        help='How ticks are simulated.')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Processes to spread independent sub-grids across (grid engine).')
+    parser.add_argument('--every', type=int, default=1, help='Amount of ticks between rows.')
+    parser.add_argument('--format', choices=('csv', 'jsonl'), default='csv', help='Row format.')
+    parser.add_argument('--output', help='File to write the rows to, instead of stdout.')
+    args = parser.parse_args(argv)
+    if args.workers > 1 and args.engine != 'grid':
+        parser.error('only the grid engine runs on several workers')
+    if args.every < 1:
+        parser.error('--every must be positive')
+    rows = simulate(load(args.grid), args.ticks, args.every, args.engine, args.workers)
+    if args.output is None:
+        try:
+            write(rows, sys.stdout, args.format)
+            sys.stdout.flush()
+        except BrokenPipeError:
+            # The reader went away; keep the interpreter from failing again when it flushes
+            # stdout on exit.
+            os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+            return 1
+    else:
+        with open(args.output, 'w', newline='') as file:
+            write(rows, file, args.format)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,248 @@
+import json
+import mmap
+import struct
+from array import array
+from typing import Iterable, List, NamedTuple, Optional
+
+from .grid_engine import reachable
+from .power_bank import PowerBank
+from .power_consumer import PowerConsumer
+from .power_load import PowerLoad
+from .power_source import PowerSource
+
+CONSUMER = 0
+SOURCE = 1
+BANK = 2
+
+KINDS = {'consumer': CONSUMER, 'source': SOURCE, 'bank': BANK}
+
+MAGIC = b'PWRGRID1'
+HEADER = struct.Struct('<8s3q')
+# Columns of the binary format, in file order, with the header count giving their length.
+NODE_COLUMNS = ('kind', 'input', 'output', 'capacity', 'stored')
+EDGE_COLUMNS = ('edge_from', 'edge_to')
+
+
+class Scenario(NamedTuple):
+    """A grid built from a scenario file.
+
+    Attributes:
+        nodes: Every object of the grid, in file order.
+        sources: The sources to supply on every tick, in order.
+    """
+    nodes: List[PowerConsumer]
+    sources: List[PowerSource]
+
+
+# Classes a scenario holds, and the kind they're stored as.
+_TYPES = {PowerLoad: CONSUMER, PowerSource: SOURCE, PowerBank: BANK}
+
+
+def _check(node: PowerConsumer):
+    """Reject the objects a scenario can't describe without changing how the grid behaves."""
+    if type(node) not in _TYPES:
+        raise ValueError(f'{type(node).__name__} objects can\'t be stored in a scenario')
+    if isinstance(node, PowerSource) and node.policy() is not None:
+        raise ValueError('only the default greedy allocation can be stored in a scenario')
+
+
+def _columns(sources: Iterable[PowerSource], nodes: Optional[List[PowerConsumer]] = None,
+             check: bool = False):
+    """Flatten the grid fed by the given sources, or the given nodes in order, into columns.
+
+    Unless `check` is set, other consumers are flattened into loads with their current input, as
+    engines that treat them as stateless loads would see them.
+    """
+    sources = list(sources)
+    if nodes is None:
+        nodes = reachable(sources)
+    if check:
+        for node in nodes:
+            _check(node)
+    index = {id(node): position for position, node in enumerate(nodes)}
+    columns = {name: array('q') for name in NODE_COLUMNS + EDGE_COLUMNS + ('order',)}
+    for position, node in enumerate(nodes):
+        bank = isinstance(node, PowerBank)
+        columns['kind'].append(BANK if bank else SOURCE if isinstance(node, PowerSource)
+                               else CONSUMER)
+        columns['input'].append(node.input() if isinstance(node, PowerConsumer) else 0)
+        columns['output'].append(node.max_output() if bank else
+                                 node.output() if isinstance(node, PowerSource) else 0)
+        columns['capacity'].append(node.capacity() if bank else 0)
+        columns['stored'].append(node.stored_power() if bank else 0)
+        if isinstance(node, PowerSource):
+            for consumer in node._connections:
+                columns['edge_from'].append(position)
+                columns['edge_to'].append(index[id(consumer)])
+    columns['order'].extend(index[id(source)] for source in sources)
+    return columns
+
+
+def _build(columns) -> Scenario:
+    """Create the objects described by the columns and wire them in bulk."""
+    nodes = [PowerLoad(power_input) if kind == CONSUMER else
+             PowerSource(power_output) if kind == SOURCE else
+             PowerBank(power_input, power_output, capacity)
+             for kind, power_input, power_output, capacity in zip(
+                 columns['kind'], columns['input'], columns['output'], columns['capacity'])]
+    for kind, node, stored in zip(columns['kind'], nodes, columns['stored']):
+        if kind == BANK:
+            node._stored_power = stored
+    edges_from, edges_to = columns['edge_from'], columns['edge_to']
+    start = 0
+    while start < len(edges_from):
+        end = start + 1
+        while end < len(edges_from) and edges_from[end] == edges_from[start]:
+            end += 1
+        nodes[edges_from[start]].connect_many(nodes[target] for target in edges_to[start:end])
+        start = end
+    return Scenario(nodes, [nodes[position] for position in columns['order']])
+
+
+def save_json(path: str, sources: Iterable[PowerSource]):
+    """Write the grid fed by the given sources as a human readable JSON scenario.
+
+    Args:
+        path: File to write.
+        sources: The sources to supply on every tick, in order.
+
+    Raises:
+        ValueError: If the grid holds objects a scenario can't describe.
+    """
+    columns = _columns(sources, check=True)
+    names = {code: name for name, code in KINDS.items()}
+    nodes = []
+    for kind, power_input, power_output, capacity, stored in zip(
+            *(columns[name] for name in NODE_COLUMNS)):
+        node = {'kind': names[kind]}
+        if kind != SOURCE:
+            node['input'] = power_input
+        if kind != CONSUMER:
+            node['output'] = power_output
+        if kind == BANK:
+            node['capacity'] = capacity
+            node['stored'] = stored
+        nodes.append(node)
+    with open(path, 'w') as file:
+        json.dump({'nodes': nodes,
+                   'edges': [list(edge) for edge in zip(columns['edge_from'], columns['edge_to'])],
+                   'sources': columns['order'].tolist()}, file, indent=1)
+
+
+def load_json(path: str) -> Scenario:
+    """Build the grid described by a JSON scenario.
+
+    Args:
+        path: File to read.
+
+    Returns:
+        Scenario: The objects of the grid and the sources to supply.
+    """
+    with open(path) as file:
+        data = json.load(file)
+    nodes = data['nodes']
+    columns = {
+        'kind': [KINDS[node['kind']] for node in nodes],
+        'input': [node.get('input', 0) for node in nodes],
+        'output': [node.get('output', 0) for node in nodes],
+        'capacity': [node.get('capacity', 0) for node in nodes],
+        'stored': [node.get('stored', 0) for node in nodes],
+        'edge_from': [edge[0] for edge in data['edges']],
+        'edge_to': [edge[1] for edge in data['edges']],
+        'order': data['sources'],
+    }
+    return _build(columns)
+
+
+def _write_binary(file, columns):
+    """Write flattened columns in the columnar format into an open binary file."""
+    file.write(HEADER.pack(MAGIC, len(columns['kind']), len(columns['edge_from']),
+                           len(columns['order'])))
+    for name in NODE_COLUMNS + EDGE_COLUMNS + ('order',):
+        file.write(columns[name].tobytes())
+
+
+def _read_binary(data: memoryview) -> Scenario:
+    """Build the grid held by a buffer in the columnar format, reading the columns in place."""
+    magic, nodes, edges, order = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError('Not a columnar scenario')
+    view = data[HEADER.size:].cast('q')
+    columns = {}
+    try:
+        start = 0
+        for name, length in [(name, nodes) for name in NODE_COLUMNS] + \
+                [(name, edges) for name in EDGE_COLUMNS] + [('order', order)]:
+            columns[name] = view[start:start + length]
+            start += length
+        return _build(columns)
+    finally:
+        for column in columns.values():
+            column.release()
+        view.release()
+
+
+def save_binary(path: str, sources: Iterable[PowerSource]):
+    """Write the grid fed by the given sources as a compact columnar scenario.
+
+    The file holds a header followed by columns of native 64-bit integers, so it can be
+    memory-mapped as is.
+
+    Args:
+        path: File to write.
+        sources: The sources to supply on every tick, in order.
+
+    Raises:
+        ValueError: If the grid holds objects a scenario can't describe.
+    """
+    columns = _columns(sources, check=True)
+    with open(path, 'wb') as file:
+        _write_binary(file, columns)
+
+
+def load_binary(path: str) -> Scenario:
+    """Build the grid described by a columnar scenario, reading the columns in place.
+
+    Args:
+        path: File to read.
+
+    Returns:
+        Scenario: The objects of the grid and the sources to supply.
+
+    Raises:
+        ValueError: If the file isn't a columnar scenario.
+    """
+    with open(path, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        view = memoryview(data)
+        try:
+            return _read_binary(view)
+        finally:
+            view.release()
+
+
+def load(path: str) -> Scenario:
+    """Build the grid described by a scenario, picking the format from the file extension.
+
+    Args:
+        path: A `.json` scenario, or a columnar one otherwise.
+
+    Returns:
+        Scenario: The objects of the grid and the sources to supply.
+    """
+    return load_json(path) if path.endswith('.json') else load_binary(path)
+
+
+def save(path: str, sources: Iterable[PowerSource]):
+    """Write a scenario, picking the format from the file extension.
+
+    Args:
+        path: A `.json` file, or any other for the columnar format.
+        sources: The sources to supply on every tick, in order.
+
+    Raises:
+        ValueError: If the grid holds objects a scenario can't describe.
+    """
+    if path.endswith('.json'):
+        save_json(path, sources)
+    else:
+        save_binary(path, sources)
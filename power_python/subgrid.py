@@ -0,0 +1,192 @@
+from array import array
+from bisect import bisect_left, bisect_right
+from itertools import accumulate
+from typing import Iterable, List, NamedTuple, Optional
+
+from .power_consumer import PowerConsumer
+from .power_source import _receiver
+
+
+class _Plan(NamedTuple):
+    """What a `SubGrid` keeps to hand out power, until something under it changes."""
+    members: List[PowerConsumer]
+    inputs: array
+    # Cumulative demand, or `None` when a negative input keeps it from being bisected.
+    demand: Optional[array]
+    # Positions of the members powered when they get their whole input, and of the ones powered
+    # even when they get nothing.
+    fed: array
+    starved: array
+    total: int
+
+
+class SubGrid(PowerConsumer):
+    """A group of consumers seen from the outside as a single consumer.
+
+    Its input is the total input of its members, and the power it receives is handed to them
+    greedily in the order they were added. The inputs are read once and kept until something
+    under the group changes, so neither asking a stable group for its input nor powering it
+    walks every device under it. Groups can be nested.
+
+    Engines that only see the objects `reachable()` finds, such as `GridEngine`, can't see the
+    members of a group, so they reject grids holding one.
+
+    Adding or removing members keeps the totals up to date on its own. If the input of a member
+    changes in some other way, call `invalidate()` on the group holding it.
+    """
+    __slots__ = ('_members', '_parent', '_plan')
+
+    def __init__(self, members: Iterable[PowerConsumer] = ()):
+        """Initialize the `SubGrid`.
+
+        Args:
+            members: The consumers grouped, in the order they'll be supplied.
+        """
+        PowerConsumer.__init__(self, 0)
+        self._members = {}
+        self._parent = None
+        self._plan = None
+        for member in members:
+            self.connect(member)
+
+    def members(self) -> List[PowerConsumer]:
+        """Getter for the grouped consumers.
+
+        Returns:
+            List[PowerConsumer]: The members, in the order they're supplied.
+        """
+        return list(self._members)
+
+    def parent(self) -> Optional['SubGrid']:
+        """Getter for the group holding this one.
+
+        Returns:
+            Optional[SubGrid]: The enclosing group, or `None` if this group isn't nested.
+        """
+        return self._parent
+
+    def connect(self, consumer: PowerConsumer) -> bool:
+        """Adds the given `PowerConsumer` to the group.
+
+        Args:
+            consumer: The object that will start being supplied through this group.
+
+        Returns:
+            bool: `True` if it was added successfully, `False` if it was already a member, if
+                it's a group already nested somewhere else or if it'd end up containing itself.
+        """
+        if consumer in self._members:
+            return False
+        if isinstance(consumer, SubGrid):
+            if consumer._parent is not None:
+                return False
+            group = self
+            while group is not None:
+                if group is consumer:
+                    return False
+                group = group._parent
+            consumer._parent = self
+        self._members[consumer] = None
+        self.invalidate()
+        return True
+
+    def disconnect(self, consumer: PowerConsumer) -> bool:
+        """Removes the given `PowerConsumer` from the group.
+
+        Args:
+            consumer: The object that will stop being supplied through this group.
+
+        Returns:
+            bool: `True` if it was removed successfully, `False` if it wasn't a member.
+        """
+        if consumer not in self._members:
+            return False
+        del self._members[consumer]
+        if isinstance(consumer, SubGrid):
+            consumer._parent = None
+        self.invalidate()
+        return True
+
+    def invalidate(self):
+        """Discard the cached plan of this group and of the groups enclosing it."""
+        group = self
+        # A group can only hold a plan while the groups under it hold theirs, so the walk can stop
+        # at the first group that already lost it.
+        while group is not None and group._plan is not None:
+            group._plan = None
+            group = group._parent
+
+    def _build(self) -> _Plan:
+        """Work out the cumulative demand of the members and which of them have to be powered."""
+        members = list(self._members)
+        inputs = array('q', [member.input() for member in members])
+        fed = array('q')
+        starved = array('q')
+        for position, member in enumerate(members):
+            if isinstance(member, SubGrid):
+                plan = member._plan if member._plan is not None else member._build()
+                when_fed, when_starved = bool(plan.fed), bool(plan.starved)
+            else:
+                called = _receiver(member)
+                when_fed, when_starved = called is not False, called is None
+            if when_fed:
+                fed.append(position)
+            if when_starved:
+                starved.append(position)
+        demand = array('q', accumulate(inputs))
+        if any(power_input < 0 for power_input in inputs):
+            # The cumulative demand can't be bisected, so every member is powered.
+            demand = None
+            fed = starved = array('q', range(len(members)))
+        self._plan = _Plan(members, inputs, demand, fed, starved, sum(inputs))
+        return self._plan
+
+    def input(self) -> int:
+        """Getter for the power intake of the whole group.
+
+        Returns:
+            int: Amount of watts per second the members consume together.
+        """
+        plan = self._plan
+        if plan is None:
+            plan = self._build()
+        return plan.total
+
+    def receive_power(self, watt_amount: int) -> int:
+        """Hand the received power to the members, greedily in the order they were added.
+
+        The member where the power runs out is found by bisecting the cumulative demand, and
+        only it and the members `PowerSource.supply_power()` would have to power are called, so
+        a tick costs as much as the banks and unknown devices that get power, not as much as the
+        whole group.
+
+        Args:
+            watt_amount: Amount of power, in watts, this group receives during a second span.
+
+        Returns:
+            int: Rounded percentage of efficiency of the whole group, based on its total input.
+        """
+        plan = self._plan
+        if plan is None:
+            plan = self._build()
+        members, inputs, demand = plan.members, plan.inputs, plan.demand
+        if demand is None:
+            remaining = watt_amount
+            for member, supply in zip(members, inputs):
+                if remaining < supply:
+                    supply = remaining
+                member.receive_power(supply)
+                remaining -= supply
+        else:
+            cut = bisect_right(demand, watt_amount)
+            fed = plan.fed
+            for index in range(bisect_left(fed, cut)):
+                position = fed[index]
+                members[position].receive_power(inputs[position])
+            if cut < len(members):
+                members[cut].receive_power(watt_amount - demand[cut - 1] if cut else watt_amount)
+                starved = plan.starved
+                for index in range(bisect_right(starved, cut), len(starved)):
+                    members[starved[index]].receive_power(0)
+        power_input = plan.total
+        return int(watt_amount / power_input * 100.0) if power_input else 100
@@ -0,0 +1,196 @@
+"""Parameter sweep for sizing `PowerBank`s against a fixed load.
+
+Each configuration is a bank fed by a supply that follows a daily profile and feeding a constant
+load. Configurations are spread across a process pool in chunks, and results are appended to a
+CSV file as soon as each chunk finishes, so an interrupted sweep can be resumed by running it
+again: configurations already in the file are skipped.
+
+Run it with `python -m power_python.sweep --help`.
+"""
+import argparse
+import csv
+import itertools
+import os
+import sys
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from .power_bank import PowerBank
+from .power_load import PowerLoad
+
+FIELDS = ('power_input', 'power_output', 'capacity', 'received', 'supplied', 'demand',
+          'coverage', 'stored_power')
+
+
+def evaluate(config: Tuple[int, int, int], load: int, supply: Sequence[Tuple[int, int]],
+             days: int) -> List:
+    """Simulate one bank configuration.
+
+    Args:
+        config: The bank's input, output and capacity.
+        load: Constant demand fed by the bank, in watts.
+        supply: Daily supply profile, as `(seconds, watts)` phases offered to the bank.
+        days: Amount of times the profile is repeated.
+
+    Returns:
+        List: One row with the values of `FIELDS`.
+    """
+    power_input, power_output, capacity = config
+    bank = PowerBank(power_input, power_output, capacity)
+    bank.connect(PowerLoad(load))
+    received = supplied = seconds = 0
+    for _ in range(days):
+        for duration, watts in supply:
+            totals = bank.advance(duration, min(watts, power_input))
+            received += totals.received
+            supplied += totals.supplied
+            seconds += duration
+    demand = load * seconds
+    return [power_input, power_output, capacity, received, supplied, demand,
+            supplied / demand if demand else 1.0, bank.stored_power()]
+
+
+def _evaluate_chunk(configs: List[Tuple[int, int, int]], load: int,
+                    supply: Sequence[Tuple[int, int]], days: int) -> List[List]:
+    """Simulate a chunk of configurations inside a worker process."""
+    return [evaluate(config, load, supply, days) for config in configs]
+
+
+def _chunks(configs: Iterable[Tuple[int, int, int]], size: int) -> Iterator[List]:
+    """Split the configurations into lists of at most `size` elements."""
+    iterator = iter(configs)
+    chunk = list(itertools.islice(iterator, size))
+    while chunk:
+        yield chunk
+        chunk = list(itertools.islice(iterator, size))
+
+
+def completed(path: str) -> set:
+    """Configurations already present in a results file.
+
+    Args:
+        path: CSV file written by `sweep()`.
+
+    Returns:
+        set: `(power_input, power_output, capacity)` of every row in the file, empty if the file
+            doesn't exist.
+    """
+    if not os.path.exists(path):
+        return set()
+    done = set()
+    with open(path, newline='') as file:
+        for row in csv.DictReader(file):
+            try:
+                done.add((int(row['power_input']), int(row['power_output']),
+                          int(row['capacity'])))
+            except (TypeError, ValueError):
+                # Cut short by an interrupted run, so it'll be evaluated again.
+                continue
+    return done
+
+
+def _drop_partial_row(path: str):
+    """Truncate a results file after its last complete row, if the last one was cut short."""
+    if not os.path.exists(path):
+        return
+    with open(path, 'rb+') as file:
+        end = file.seek(0, os.SEEK_END)
+        if not end:
+            return
+        file.seek(end - 1)
+        if file.read(1) == b'\n':
+            return
+        # Scan backwards for the end of the last complete row, without reading the whole file.
+        while end:
+            start = max(end - 4096, 0)
+            file.seek(start)
+            newline = file.read(end - start).rfind(b'\n')
+            if newline >= 0:
+                file.truncate(start + newline + 1)
+                return
+            end = start
+        file.truncate(0)
+
+
+def sweep(inputs: Iterable[int], outputs: Iterable[int], capacities: Iterable[int], load: int,
+          supply: Sequence[Tuple[int, int]], path: str, days: int = 1,
+          workers: Optional[int] = None, chunk_size: int = 256) -> int:
+    """Evaluate every combination of bank parameters, streaming the results into a CSV file.
+
+    Args:
+        inputs: Candidate bank inputs, in watts.
+        outputs: Candidate bank outputs, in watts.
+        capacities: Candidate bank capacities, in Joules.
+        load: Constant demand fed by the bank, in watts.
+        supply: Daily supply profile, as `(seconds, watts)` phases offered to the bank.
+        path: CSV file the results are appended to. Configurations already in it are skipped,
+            and a last row left incomplete by an interrupted run is dropped.
+        days: Amount of times the supply profile is repeated.
+        workers: Amount of worker processes. Defaults to the amount of processors.
+        chunk_size: Amount of configurations handed to a worker at once.
+
+    Returns:
+        int: Amount of configurations evaluated by this call.
+    """
+    _drop_partial_row(path)
+    done = completed(path)
+    configs = (config for config in itertools.product(inputs, outputs, capacities)
+               if config not in done)
+    chunks = _chunks(configs, chunk_size)
+    workers = workers or os.cpu_count() or 1
+    evaluated = 0
+    # An interrupted run can leave the file empty, without even a header.
+    new = not os.path.exists(path) or os.path.getsize(path) == 0
+    with open(path, 'a', newline='') as file, ProcessPoolExecutor(workers) as executor:
+        writer = csv.writer(file)
+        if new:
+            writer.writerow(FIELDS)
+        # Only a couple of chunks per worker are in flight, keeping memory bounded.
+        pending = {executor.submit(_evaluate_chunk, chunk, load, supply, days)
+                   for chunk in itertools.islice(chunks, 2 * workers)}
+        while pending:
+            finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                rows = future.result()
+                writer.writerows(rows)
+                evaluated += len(rows)
+            file.flush()
+            pending |= {executor.submit(_evaluate_chunk, chunk, load, supply, days)
+                        for chunk in itertools.islice(chunks, len(finished))}
+    return evaluated
+
+
+def _values(text: str) -> List[int]:
+    """Parse either a comma separated list or a `start:stop:step` range."""
+    if ':' in text:
+        start, stop, step = (int(part) for part in text.split(':'))
+        return list(range(start, stop + 1, step))
+    return [int(part) for part in text.split(',')]
+
+
+def _profile(text: str) -> List[Tuple[int, int]]:
+    """Parse a supply profile given as comma separated `seconds:watts` phases."""
+    return [tuple(int(part) for part in phase.split(':')) for phase in text.split(',')]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--inputs', type=_values, required=True,
+                        help='Bank inputs, as a list (a,b,c) or a range (start:stop:step).')
+    parser.add_argument('--outputs', type=_values, required=True, help='Bank outputs.')
+    parser.add_argument('--capacities', type=_values, required=True, help='Bank capacities.')
+    parser.add_argument('--load', type=int, required=True, help='Constant demand, in watts.')
+    parser.add_argument('--supply', type=_profile, required=True,
+                        help='Daily supply profile, as seconds:watts phases (43200:300,43200:0).')
+    parser.add_argument('--days', type=int, default=1, help='Times the profile is repeated.')
+    parser.add_argument('--workers', type=int, help='Amount of worker processes.')
+    parser.add_argument('--output', required=True, help='CSV file to append the results to.')
+    args = parser.parse_args(argv)
+    evaluated = sweep(args.inputs, args.outputs, args.capacities, args.load, args.supply,
+                      args.output, args.days, args.workers)
+    print(f'{evaluated} configurations evaluated', file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
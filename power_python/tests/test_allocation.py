@@ -0,0 +1,33 @@
+import pytest
+
+from ..power_load import PowerLoad
+from ..power_source import PowerSource
+from ..allocation import Greedy, MaxMinFair, Priority, Proportional
+from ..grid_engine import GridEngine
+
+
+def test_policies():
+    demands = [50, 10, 30, 40]
+    assert Greedy().allocate(70, demands, []) == [50, 10, 10, 0]
+    assert Proportional().allocate(70, demands, []) == [27, 5, 16, 22]
+    assert Proportional().allocate(200, demands, []) == demands
+    assert MaxMinFair().allocate(70, demands, []) == [20, 10, 20, 20]
+    assert MaxMinFair().allocate(71, demands, []) == [21, 10, 20, 20]
+    consumers = ['a', 'b', 'c', 'd']
+    priority = Priority({'c': 2, 'd': 1})
+    assert priority.allocate(80, demands, consumers) == [8, 2, 30, 40]
+    assert Priority({'c': 2}, Greedy()).allocate(80, demands, consumers) == [50, 0, 30, 0]
+
+
+def test_supply_power_with_policy():
+    p = PowerSource(60)
+    loads = [PowerLoad(60), PowerLoad(30)]
+    p.connect_many(loads)
+    p.set_policy(MaxMinFair())
+    assert p.policy() is not None and p.supply_power() == 0
+    assert [p.efficiency(load) for load in loads] == [50, 100]
+    with pytest.raises(ValueError):
+        GridEngine([p])
+    p.set_policy(None)
+    p.supply_power()
+    assert [p.efficiency(load) for load in loads] == [100, 0]
@@ -0,0 +1,14 @@
+import json
+
+from ..benchmarks import suite
+
+
+def test_suite_against_baseline(tmp_path, capsys):
+    baseline = tmp_path / 'baseline.json'
+    assert suite.main(['--scale', '0.001', '--save', str(baseline)]) == 0
+    capsys.readouterr()
+    assert suite.main(['small_grid', '--scale', '0.001', '--baseline', str(baseline),
+                       '--tolerance', '1']) == 0
+    report = json.loads(capsys.readouterr().out)
+    assert list(report['results']) == ['small_grid']
+    assert report['comparison']['small_grid']['regression'] is False
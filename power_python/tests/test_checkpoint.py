@@ -0,0 +1,43 @@
+import pytest
+
+from ..power_load import PowerLoad
+from ..power_source import PowerSource
+from ..power_bank import PowerBank
+from ..checkpoint import Checkpointer, restore
+from ..allocation import Proportional
+from ..scenario import save
+from ..subgrid import SubGrid
+
+
+def test_checkpoint_and_restore(tmp_path):
+    p = PowerSource(300)
+    b = PowerBank(150, 100, 3000)
+    p.connect_many([b, PowerLoad(100)])
+    b.connect(PowerLoad(80))
+    path = str(tmp_path / 'grid.ckpt')
+    checkpointer = Checkpointer([p, b], path, every=4)
+    for tick in range(1, 11):
+        p.supply_power()
+        b.supply_power()
+        checkpointer.record()
+        if tick == 8:
+            charge = b.stored_power()
+    checkpointer.close()
+    checkpoint = restore(path)
+    assert checkpoint.tick == 8
+    q, c = checkpoint.scenario.sources
+    assert c.stored_power() == charge and list(q._connections)[0] is c
+    with pytest.raises(ValueError):
+        restore(__file__)
+
+
+def test_checkpoint_rejects_what_it_cant_restore(tmp_path):
+    p = PowerSource(300)
+    p.connect(PowerLoad(100))
+    p.set_policy(Proportional())
+    with pytest.raises(ValueError):
+        Checkpointer([p], str(tmp_path / 'grid.ckpt'), every=4)
+    q = PowerSource(300)
+    q.connect(SubGrid([PowerLoad(100)]))
+    with pytest.raises(ValueError):
+        save(str(tmp_path / 'grid.json'), [q])
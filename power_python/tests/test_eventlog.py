@@ -0,0 +1,62 @@
+import pytest
+
+from ..eventlog import EventLog, Replay
+from ..power_bank import PowerBank
+from ..power_load import PowerLoad
+from ..power_source import PowerSource
+
+
+def test_log_and_replay(tmp_path):
+    p = PowerSource(300)
+    b = PowerBank(150, 100, 3000)
+    p.connect_many([b, PowerLoad(100)])
+    path = str(tmp_path / 'run.log')
+    log = EventLog(path, [p, b], every=4)
+    charges = [b.stored_power()]
+    extra = PowerLoad(80)
+    for tick in range(1, 11):
+        log.tick()
+        charges.append(b.stored_power())
+        if tick == 3:
+            log.connect(b, extra)
+        elif tick == 6:
+            log.set_input(extra, 20)
+            log.set_output(p, 120)
+        elif tick == 7:
+            log.disconnect(p, b)
+            log.set_charge(b, 1000)
+    log.close()
+
+    replay = Replay(path)
+    assert replay.ticks() == 10 and replay.snapshots() == [0, 4, 8]
+    q, c = replay.run().sources
+    assert c.stored_power() == b.stored_power() and not q.is_connected(c)
+    for tick in (9, 2, 5, 7, 10, 0, 8):
+        _, c = replay.seek(tick).sources
+        assert c.stored_power() == charges[tick]
+    with pytest.raises(ValueError):
+        replay.seek(11)
+    replay.close()
+    with pytest.raises(ValueError):
+        Replay(__file__)
+
+
+def test_set_input_drops_only_the_feeders(tmp_path):
+    p, q, r = PowerSource(100), PowerSource(100), PowerSource(100)
+    shared = PowerLoad(60)
+    p.connect(shared)
+    r.connect(PowerLoad(60))
+    log = EventLog(str(tmp_path / 'run.log'), [p, q, r])
+    log.connect(q, shared)
+    log.tick()
+    log.set_input(shared, 30)
+    assert p._index is None and q._index is None and r._index
+    assert log.tick() == [70, 70, 40]
+    log.disconnect(p, shared)
+    log.tick()
+    log.set_input(shared, 10)
+    assert p._index and q._index is None
+    log.close()
+    replay = Replay(str(tmp_path / 'run.log'))
+    assert replay.run().sources[1].supply_power() == 90
+    replay.close()
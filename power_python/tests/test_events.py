@@ -0,0 +1,63 @@
+from ..power_consumer import PowerConsumer
+from ..power_source import PowerSource
+from ..power_bank import PowerBank
+from ..events import EventSimulator
+
+
+class Load(PowerConsumer):
+    def receive_power(self, watt_amount: int) -> int:
+        return int(watt_amount / self.input() * 100.0)
+
+
+def build():
+    p = PowerSource(300)
+    b = PowerBank(150, 100, 10000)
+    c = PowerBank(60, 40, 500)
+    load = Load(40)
+    p.connect(b)
+    b.connect(load)
+    b.connect(c)
+    c.connect(Load(25))
+    return [p, b, c], [b, c], load
+
+
+def test_matches_supply_power():
+    sources, banks, load = build()
+    event_sources, event_banks, event_load = build()
+    simulator = EventSimulator(event_sources, record=True)
+    simulator.schedule(3000, lambda: event_sources[0].connect(PowerBank(100, 0, 10 ** 9)))
+    history = []
+    for tick in range(20000):
+        if tick == 3000:
+            sources[0].connect(PowerBank(100, 0, 10 ** 9))
+        for source in sources:
+            source.supply_power()
+        history.append(banks[1].stored_power())
+    simulator.run(20000)
+    assert simulator.tick() == 20000 and simulator.steps() < 100
+    assert [b.stored_power() for b in event_banks] == [b.stored_power() for b in banks]
+    assert simulator.charge_history(event_banks[1]) == history
+    assert simulator.charge_history(event_banks[1], 2990, 3010) == history[2990:3010]
+
+
+def test_full_bank_with_two_feeders():
+    grids = []
+    for _ in range(2):
+        p, q = PowerSource(70), PowerSource(60)
+        b = PowerBank(100, 80, 5000)
+        b.receive_power(5000)
+        p.connect(b)
+        q.connect(b)
+        b.connect(Load(90))
+        # The bank supplies between its feeders, so it's offered power on both sides of it.
+        grids.append(([p, b, q], b))
+    (sources, bank), (event_sources, event_bank) = grids
+    history = []
+    for _ in range(86400):
+        for source in sources:
+            source.supply_power()
+        history.append(bank.stored_power())
+    simulator = EventSimulator(event_sources, record=True)
+    simulator.run(86400)
+    assert simulator.steps() < 10 and event_bank.stored_power() == bank.stored_power()
+    assert simulator.charge_history(event_bank, 86000) == history[86000:]
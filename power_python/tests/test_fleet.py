@@ -0,0 +1,65 @@
+import pickle
+import random
+
+import pytest
+
+from ..fleet import ChargeIndex
+from ..power_bank import PowerBank
+from ..power_load import PowerLoad
+from ..power_source import PowerSource
+
+
+def test_charge_index():
+    rng = random.Random(3)
+    banks = [PowerBank(rng.randint(1, 50), rng.randint(1, 50), rng.randint(0, 500))
+             for _ in range(200)]
+    for bank in banks:
+        bank.connect(PowerLoad(rng.randint(0, 30)))
+    source = PowerSource(2000)
+    source.connect_many(banks)
+    index = ChargeIndex(banks[:150], resolution=16)
+    assert not index.add(banks[0]) and index.remove(banks[149]) and index.count() == 149
+    indexed = banks[:149]
+
+    def level(bank):
+        return bank.stored_power() / bank.capacity() if bank.capacity() > 0 else 1.0
+    for tick in range(30):
+        source.supply_power()
+        for bank in banks:
+            bank.supply_power()
+        banks[tick].advance(5, 10)
+        for fraction in (0.1, 0.5, 1.0, 1.5):
+            below = [bank for bank in indexed if level(bank) < fraction]
+            assert set(index.below(fraction)) == set(below)
+            assert index.count_below(fraction) == len(below)
+            assert set(index.at_least(fraction)) == set(indexed) - set(below)
+        assert [level(bank) for bank in index.fullest(20)] == sorted(
+            map(level, indexed), reverse=True)[:20]
+        assert [level(bank) for bank in index.emptiest(20)] == sorted(map(level, indexed))[:20]
+    with pytest.raises(ValueError):
+        ChargeIndex([banks[0]])
+    copy = pickle.loads(pickle.dumps(banks[0]))
+    assert copy._fleet is None and copy.stored_power() == banks[0].stored_power()
+    assert ChargeIndex([copy]).count() == 1
+
+
+def test_charge_index_clustered():
+    rng = random.Random(5)
+    banks = [PowerBank(10, 10, 100) for _ in range(3000)]
+    for bank in banks:
+        bank.receive_power(rng.randint(100, 130) if rng.random() < 0.9 else rng.randint(-5, 5))
+    index = ChargeIndex(banks, resolution=10)
+
+    def level(bank):
+        return bank.stored_power() / bank.capacity()
+    # Queried while the fleet churns, then while only a few banks change at a time.
+    for changed in (3000, 3000, 3000, 10, 10, 10):
+        for bank in rng.sample(banks, changed):
+            bank._store(bank.stored_power() + rng.randint(-3, 3))
+        assert [level(bank) for bank in index.fullest(50)] == sorted(
+            map(level, banks), reverse=True)[:50]
+        assert [level(bank) for bank in index.emptiest(50)] == sorted(map(level, banks))[:50]
+        for fraction in (0.01, 1.1):
+            assert index.count_below(fraction) == sum(level(bank) < fraction for bank in banks)
+            assert set(index.below(fraction)) == {b for b in banks if level(b) < fraction}
+            assert set(index.at_least(fraction)) == {b for b in banks if level(b) >= fraction}
@@ -0,0 +1,39 @@
+import pytest
+
+from ..allocation import Proportional
+from ..flow import FlowSolver
+from ..power_bank import PowerBank
+from ..power_load import PowerLoad
+from ..power_source import PowerSource
+
+
+def test_shared_consumers():
+    p, q = PowerSource(100), PowerSource(100)
+    a, b, c = PowerLoad(150), PowerLoad(50), PowerLoad(40)
+    p.connect_many([a, b, c])
+    q.connect_many([a, b])
+    solver = FlowSolver([p, q])
+    # Supplying p and then q would leave c without power.
+    assert solver.tick() == [0, 0]
+    flows = {(source, consumer): watts for source, consumer, watts in solver.flows()}
+    assert flows[(p, c)] == 40 and sum(flows.values()) == 200
+    assert p.efficiency(c) == 100 and q.efficiency(a) == p.efficiency(a)
+    assert not solver.solve()
+
+
+def test_warm_start():
+    p, q = PowerSource(100), PowerSource(100)
+    bank = PowerBank(60, 80, 1000)
+    load = PowerLoad(120)
+    p.connect_many([bank, load])
+    q.connect(load)
+    bank.connect(load)
+    solver = FlowSolver([p, q], costs={q: 5})
+    assert solver.tick() == [0, 20, 0] and bank.stored_power() == 60
+    # The bank can now supply, and being cheaper than q it takes over from it.
+    assert solver.tick() == [0, 80, 0] and bank.stored_power() == 60
+    flows = {(source, consumer): watts for source, consumer, watts in solver.flows()}
+    assert flows[(bank, load)] == 60 and flows[(q, load)] == 20
+    p.set_policy(Proportional())
+    with pytest.raises(ValueError):
+        solver.refresh()
@@ -0,0 +1,44 @@
+from ..power_consumer import PowerConsumer
+from ..power_source import PowerSource
+from ..power_bank import PowerBank
+from ..grid_engine import GridEngine
+
+
+class Load(PowerConsumer):
+    def receive_power(self, watt_amount: int) -> int:
+        return int(watt_amount / self.input() * 100.0)
+
+
+def build():
+    p = PowerSource(300)
+    b = PowerBank(150, 100, 3000)
+    c = PowerBank(40, 40, 500)
+    p.connect(b)
+    p.connect(Load(100))
+    p.connect(Load(100))
+    b.connect(c)
+    b.connect(Load(80))
+    return [p, b, c], [b, c]
+
+
+def test_matches_supply_power():
+    sources, banks = build()
+    engine_sources, engine_banks = build()
+    engine = GridEngine(engine_sources)
+    for _ in range(50):
+        assert engine.tick() == [s.supply_power() for s in sources]
+        assert [engine.stored_power(b) for b in engine_banks] == [b.stored_power() for b in banks]
+    engine.sync()
+    assert [b.stored_power() for b in engine_banks] == [b.stored_power() for b in banks]
+
+
+def test_supplied():
+    p = PowerSource(250)
+    loads = [Load(100), Load(100), Load(100)]
+    for load in loads:
+        p.connect(load)
+    engine = GridEngine([p])
+    assert engine.supplied(p, loads[0]) == 0
+    engine.run(3)
+    assert engine.ticks() == 3 and engine.remaining() == [0]
+    assert [engine.supplied(p, load) for load in loads] == [100, 100, 50]
@@ -0,0 +1,34 @@
+import pytest
+
+from ..live import FIELD, SEQUENCE_OFFSET, LiveState, LiveView
+from ..power_bank import PowerBank
+from ..power_load import PowerLoad
+from ..power_source import PowerSource
+
+
+def test_live_state():
+    p = PowerSource(100)
+    b = PowerBank(60, 30, 1000)
+    load = PowerLoad(40)
+    p.connect_many([b, load])
+    state = LiveState([p, b, load], every=2)
+    view = LiveView(state.name())
+    try:
+        for _ in range(3):
+            p.supply_power()
+            state.record()
+        snapshot = view.snapshot()
+        assert snapshot.tick == 2 and view.sequence() == 2
+        assert snapshot.stored_power.tolist() == [0, 120, 0]
+        assert snapshot.output.tolist() == [100, 30, 0]
+        assert snapshot.efficiency.tolist() == [0, 100, 100]
+        assert view.read(lambda columns: max(columns['stored_power'])) == 120
+        with pytest.raises(TypeError):
+            view.column('output')[0] = 1
+        # An update in progress makes readers wait for the next one.
+        FIELD.pack_into(state._memory.buf, SEQUENCE_OFFSET, 3)
+        with pytest.raises(TimeoutError):
+            view.snapshot(attempts=3)
+    finally:
+        view.close()
+        state.close()
@@ -0,0 +1,41 @@
+import pytest
+
+from ..power_source import PowerSource
+from ..power_bank import PowerBank
+from ..network import PowerNetwork
+
+
+def test_schedule():
+    n = PowerNetwork()
+    p = PowerSource(300)
+    a, b, c = PowerBank(100, 100, 1000), PowerBank(50, 50, 1000), PowerBank(50, 50, 1000)
+    assert n.connect(b, c) and n.connect(a, b) and n.connect(p, a)
+    assert n.schedule() == [p, a, b, c]
+    assert not n.connect(c, a) and not n.connect(c, b) and not n.connect(a, b)
+    n.tick()
+    n.tick()
+    assert [a.stored_power(), b.stored_power(), c.stored_power()] == [100, 0, 100]
+    assert n.disconnect(a, b) and n.schedule() == [b, p, c, a]
+
+
+def test_cycle_outside_network():
+    n = PowerNetwork()
+    a, b = PowerBank(100, 100, 1000), PowerBank(50, 50, 1000)
+    a.connect(b)
+    assert n.add(a) and not n.add(b) and n.nodes() == [a, b]
+    b.connect(a)
+    n.add(PowerSource(10))
+    with pytest.raises(ValueError):
+        n.schedule()
+
+
+def test_efficiency_stats():
+    n = PowerNetwork()
+    p = PowerSource(100)
+    a, b = PowerBank(100, 50, 1000), PowerBank(100, 50, 1000)
+    n.connect(p, a)
+    n.connect(a, b)
+    n.tick()
+    stats = n.efficiency_stats()
+    assert stats.sources == [p, a] and stats.consumers == [a, b]
+    assert stats.last.tolist() == [100, 50]
@@ -0,0 +1,72 @@
+import pytest
+
+from ..power_consumer import PowerConsumer
+from ..power_source import PowerSource
+from ..power_bank import PowerBank
+from ..grid_engine import GridEngine
+from ..partition import ParallelGrid, components, simulate_parallel
+
+
+class Load(PowerConsumer):
+    def receive_power(self, watt_amount: int) -> int:
+        return int(watt_amount / self.input() * 100.0)
+
+
+def build():
+    p, q, r = PowerSource(300), PowerSource(200), PowerSource(100)
+    b, c = PowerBank(150, 100, 3000), PowerBank(50, 50, 500)
+    p.connect(b)
+    b.connect(Load(80))
+    r.connect(b)
+    q.connect(c)
+    c.connect(Load(30))
+    return [p, q, b, c, r], [b, c]
+
+
+def test_components():
+    sources, _ = build()
+    p, q, b, c, r = sources
+    assert components(sources) == [[p, b, r], [q, c]]
+
+
+def test_simulate_parallel():
+    sources, banks = build()
+    engine_sources, engine_banks = build()
+    engine = GridEngine(engine_sources)
+    expected = [engine.tick() for _ in range(20)]
+    assert simulate_parallel(sources, 20, max_workers=2) == expected
+    assert [b.stored_power() for b in banks] == [engine.stored_power(b) for b in engine_banks]
+
+
+def test_simulate_parallel_deep_chain():
+    grids = []
+    for _ in range(2):
+        chain = [PowerBank(10, 10 + index % 3, 1000) for index in range(1000)]
+        for bank, next_bank in zip(chain, chain[1:]):
+            bank.connect(next_bank)
+        p = PowerSource(100)
+        p.connect(chain[0])
+        grids.append(([p] + chain, chain))
+    engine = GridEngine(grids[1][0])
+    expected = [engine.tick() for _ in range(3)]
+    assert simulate_parallel(grids[0][0], 3, max_workers=2) == expected
+    assert [b.stored_power() for b in grids[0][1]] == engine.charges()
+
+
+def test_parallel_grid_keeps_its_workers():
+    sources, banks = build()
+    engine_sources, _ = build()
+    engine = GridEngine(engine_sources)
+    with ParallelGrid(sources, max_workers=2) as grid:
+        workers = list(grid._workers)
+        for block in (3, 1, 7):
+            grid.run(block)
+            engine.run(block)
+            assert grid.remaining() == engine.remaining()
+            assert grid.stored() == sum(engine.charges())
+        assert grid._workers == workers and all(worker.is_alive() for worker in workers)
+        grid.sync()
+    assert [b.stored_power() for b in banks] == engine.charges()
+    assert not any(worker.is_alive() for worker in workers)
+    with pytest.raises(ValueError):
+        grid.run(1)
@@ -1,5 +1,9 @@
+import os
+import tracemalloc
+
 from ..power_source import PowerSource
 from ..power_bank import PowerBank
+from ..power_load import PowerLoad
 
 
 def test_example():
@@ -10,3 +14,130 @@ def test_example():
     assert b.capacity() == 3000 and b.input() == 150 and b.output() == 0
     assert p.connect(b) and not p.connect(b)
     assert p.supply_power() == p.output() - b.input() and b.output() == 150
+
+
+def test_advance():
+    p = PowerSource(300)
+    b = PowerBank(150, 100, 1000)
+    p.connect(b)
+    assert p.advance(10) == (0, 1500)
+    assert b.advance(5, 150) == (750, 0) and b.stored_power() == 750
+    c = PowerBank(50, 50, 1000)
+    d = PowerBank(50, 50, 1000)
+    b.connect(c)
+    d.connect(PowerBank(50, 50, 1000))
+    d.receive_power(750)
+    totals = b.advance(1000, 60)
+    received = 0
+    for _ in range(1000):
+        received += 60 if d.stored_power() < d.capacity() else 0
+        d.receive_power(60)
+        d.supply_power()
+    assert b.stored_power() == d.stored_power()
+    assert totals == (received, 750 + received - d.stored_power())
+    # Draining more than the capacity on every second.
+    e = PowerBank(77, 50, 37)
+    f = PowerBank(77, 50, 37)
+    for bank in (e, f):
+        bank.connect(PowerLoad(60))
+    totals = e.advance(1000, 77)
+    received = 0
+    for _ in range(1000):
+        received += 77 if f.stored_power() < f.capacity() else 0
+        f.receive_power(77)
+        f.supply_power()
+    assert totals == (received, received - f.stored_power())
+    assert e.stored_power() == f.stored_power()
+
+
+def test_connections():
+    p = PowerSource(100)
+    banks = [PowerBank(40, 10, 100) for _ in range(3)]
+    assert p.connect_many(banks + banks[:1]) == 3
+    assert p.disconnect(banks[1]) and not p.disconnect(banks[1])
+    assert p.is_connected(banks[0]) and not p.is_connected(banks[1])
+    assert banks[0].connect_many([banks[0], banks[2]]) == 1
+    assert p.supply_power() == 20 and banks[2].stored_power() == 40
+
+
+def test_slots():
+    for device in (PowerSource(100), PowerBank(100, 100, 1000), PowerLoad(100)):
+        assert not hasattr(device, '__dict__')
+    # Leaf consumers don't carry the fields of the supplier role.
+    assert not hasattr(PowerLoad, '_connections') and hasattr(PowerBank, '_connections')
+
+
+def test_efficiency_stats():
+    p = PowerSource(100)
+    a, b = PowerBank(60, 10, 1000), PowerBank(80, 10, 1000)
+    p.connect_many([a, b])
+    p.supply_power()
+    p.disconnect(a)
+    p.connect(a)
+    p.supply_power()
+    stats = p.efficiency_stats()
+    assert stats.consumers == [b, a] and p.efficiency(b) == 100
+    assert stats.last.tolist() == [100, 33] and stats.minimum.tolist() == [50, 33]
+    assert stats.mean.tolist() == [75.0, 33.0] and stats.under.tolist() == [1, 1]
+    assert stats.seconds.tolist() == [2, 1]
+
+
+def test_tick_allocations():
+    source = PowerSource(50000)
+    banks = [PowerBank(500, 1000, 100000) for _ in range(100)]
+    source.connect_many(banks)
+    for bank in banks:
+        bank.receive_power(50000)
+        bank.connect_many(PowerLoad(10 + i) for i in range(99))
+    nodes = [source] + banks
+
+    def tick():
+        for node in nodes:
+            node.supply_power()
+
+    package = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    package = [tracemalloc.Filter(True, os.path.join(package, '*')),
+               tracemalloc.Filter(False, __file__)]
+    tracemalloc.start()
+    try:
+        tick()
+        before = tracemalloc.take_snapshot().filter_traces(package)
+        tracemalloc.reset_peak()
+        start = tracemalloc.get_traced_memory()[0]
+        tick()
+        peak = tracemalloc.get_traced_memory()[1]
+        after = tracemalloc.take_snapshot().filter_traces(package)
+    finally:
+        tracemalloc.stop()
+    # Nothing is kept, and nothing proportional to the grid lives even for a moment; only a
+    # handful of integers do.
+    assert not [stat for stat in after.compare_to(before, 'lineno') if stat.count_diff > 0]
+    assert peak - start < 1024
+
+
+class WrappedLoad(PowerLoad):
+    __slots__ = ()
+
+    def receive_power(self, watt_amount):
+        return PowerLoad.receive_power(self, watt_amount)
+
+
+def test_demand_index():
+    grids = []
+    for cls in (PowerLoad, WrappedLoad):
+        p = PowerSource(95)
+        loads = [cls(i % 3 * 10) for i in range(10)]
+        bank = PowerBank(20, 20, 1000)
+        p.connect_many(loads[:4] + [bank] + loads[4:])
+        remaining = [p.supply_power() for _ in range(3)]
+        p.disconnect(loads[1])
+        # Removing a consumer empties its slot instead of dropping the index.
+        assert bool(p._index) == (cls is PowerLoad)
+        p.connect(PowerLoad(5))
+        remaining += [p.supply_power() for _ in range(3)]
+        assert p.efficiency(loads[4]) == 100
+        stats = [list(column) for column in p.efficiency_stats()[2:]]
+        grids.append((remaining, bank.stored_power(), stats))
+    # Plain loads aren't called while the bank still is, with the same outcome.
+    assert grids[0] == grids[1]
+    assert grids[0][1] == 120
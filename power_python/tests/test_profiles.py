@@ -0,0 +1,19 @@
+from ..power_source import PowerSource
+from ..profiles import DemandProfiles, ProfileLoad
+
+
+def test_profile_loads():
+    profiles = DemandProfiles()
+    flat = profiles.add([30, 60])
+    steps = profiles.add_piecewise([(0, 10), (2, 50)], period=4)
+    p = PowerSource(100)
+    loads = [ProfileLoad(profiles, steps), ProfileLoad(profiles, flat), ProfileLoad(profiles, flat)]
+    p.connect_many(loads)
+    remaining = []
+    for _ in range(4):
+        remaining.append(p.supply_power())
+        profiles.advance()
+    assert remaining == [30, 0, 0, 0]
+    assert p.efficiency(loads[1]) == 83 and loads[0].input() == 10
+    assert profiles.tick() == 4 and profiles.demand(steps) == 10
+    assert profiles.total_demand(loads, 3, 8).tolist() == [170, 70, 130, 110, 170]
@@ -0,0 +1,44 @@
+import pytest
+
+from ..power_source import PowerSource
+from ..power_bank import PowerBank
+from ..power_load import PowerLoad
+from ..profiling import Profiler
+
+
+def test_profiler(tmp_path):
+    original = PowerSource.supply_power
+    p = PowerSource(300)
+    b = PowerBank(100, 50, 1000)
+    load = PowerLoad(30)
+    p.connect(b)
+    b.connect(load)
+    with Profiler(names={p: 'plant'}) as profiler:
+        with pytest.raises(RuntimeError):
+            Profiler().enable()
+        for _ in range(3):
+            p.supply_power()
+            b.supply_power()
+    assert PowerSource.supply_power is original
+    totals = {(profiler.name(entry.node), entry.method): (entry.calls, entry.energy)
+              for entry in profiler.entries()}
+    assert totals == {('plant', 'supply_power'): (3, 300),
+                      ('PowerBank#1', 'supply_power'): (3, 90),
+                      ('PowerBank#1', 'receive_power'): (3, 300),
+                      ('PowerLoad#2', 'receive_power'): (3, 90)}
+    assert len(profiler.report(limit=2).splitlines()) == 3
+    profiler.write_folded(tmp_path / 'profile.folded')
+    lines = (tmp_path / 'profile.folded').read_text().splitlines()
+    assert [line.rsplit(' ', 1)[0] for line in lines] == [
+        'PowerBank#1.supply_power', 'PowerBank#1.supply_power;PowerLoad#2.receive_power',
+        'plant.supply_power', 'plant.supply_power;PowerBank#1.receive_power']
+
+
+def test_index_comes_back_after_profiling():
+    p = PowerSource(300)
+    p.connect_many([PowerLoad(100), PowerBank(100, 50, 1000)])
+    with Profiler():
+        p.supply_power()
+        assert p._index is False
+    p.supply_power()
+    assert p._index
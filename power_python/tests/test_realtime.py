@@ -0,0 +1,54 @@
+import asyncio
+
+from ..power_load import PowerLoad
+from ..power_source import PowerSource
+from ..realtime import RealTimeClock
+
+
+def test_real_time_clock():
+    sources = [PowerSource(100) for _ in range(100)]
+    for source in sources:
+        source.connect(PowerLoad(60))
+    clock = RealTimeClock(sources, speedup=200.0)
+    seen = []
+
+    async def hook(tick, remaining):
+        seen.append((tick, remaining[0]))
+
+    async def watch():
+        return await clock.next_tick()
+
+    async def main():
+        clock.add_hook(hook)
+        watcher = asyncio.ensure_future(watch())
+        await asyncio.sleep(0)
+        start = asyncio.get_running_loop().time()
+        await clock.run(20)
+        return asyncio.get_running_loop().time() - start, await watcher
+
+    elapsed, first = asyncio.run(main())
+    assert first == 1 and seen == [(tick, 40) for tick in range(1, 21)]
+    # Ticks never start before their deadline; how late they run depends on the machine.
+    assert clock.tick() == 20 and elapsed >= 19 / 200.0
+    assert clock.max_lateness() >= clock.mean_lateness() >= 0.0
+
+
+def test_late_ticks_yield():
+    p = PowerSource(100)
+    p.connect(PowerLoad(60))
+    # Far more ticks per second than can be run, so every tick is late.
+    clock = RealTimeClock([p], speedup=1e9)
+    turns = []
+
+    async def other():
+        while True:
+            turns.append(clock.tick())
+            await asyncio.sleep(0)
+
+    async def main():
+        task = asyncio.ensure_future(other())
+        await clock.run(500)
+        task.cancel()
+
+    asyncio.run(main())
+    assert clock.tick() == 500 and len(turns) >= 499 and clock.max_lateness() > 0.0
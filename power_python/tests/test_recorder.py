@@ -0,0 +1,32 @@
+from ..power_consumer import PowerConsumer
+from ..power_source import PowerSource
+from ..power_bank import PowerBank
+from ..recorder import Recorder
+
+
+class Load(PowerConsumer):
+    def receive_power(self, watt_amount: int) -> int:
+        return int(watt_amount / self.input() * 100.0)
+
+
+def test_ring_buffer(tmp_path):
+    p = PowerSource(100)
+    b = PowerBank(60, 50, 1000)
+    load = Load(80)
+    p.connect(b)
+    p.connect(load)
+    for path in (None, str(tmp_path / 'history.bin')):
+        recorder = Recorder([p, b, load], 3, path=path, every=2)
+        stored = []
+        for tick in range(10):
+            p.supply_power()
+            recorder.record()
+            if tick % 2 == 0:
+                stored.append(b.stored_power())
+        assert recorder.samples() == 5 and recorder.oldest() == 2
+        assert recorder.history('stored_power', b) == stored[-3:]
+        assert recorder.history('efficiency', load) == [50, 50, 50]
+        column = recorder.column('output')
+        assert column.shape == (3, 3) and column.tolist()[0] == [100, 50, 0]
+        column.release()
+        recorder.close()
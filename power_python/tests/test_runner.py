@@ -0,0 +1,48 @@
+import json
+import os
+import subprocess
+import sys
+
+from ..power_bank import PowerBank
+from ..power_load import PowerLoad
+from ..power_source import PowerSource
+from ..runner import main
+from ..scenario import save
+
+
+def _grid(path):
+    p = PowerSource(300)
+    b = PowerBank(150, 100, 3000)
+    p.connect_many([b, PowerLoad(100)])
+    b.connect(PowerLoad(80))
+    q = PowerSource(50)
+    q.connect(PowerLoad(70))
+    save(path, [p, b, q])
+    return p, b, q
+
+
+def test_engines_agree(tmp_path):
+    grid = str(tmp_path / 'grid.json')
+    p, b, q = _grid(grid)
+    rows = []
+    for tick in range(1, 11):
+        remaining = p.supply_power() + b.supply_power() + q.supply_power()
+        if tick % 4 == 0 or tick == 10:
+            rows.append({'tick': tick, 'remaining': remaining, 'stored': b.stored_power()})
+    for args in (['--engine', 'objects'], ['--engine', 'grid', '--workers', '2']):
+        output = str(tmp_path / 'rows.jsonl')
+        assert main([grid, '--ticks', '10', '--every', '4', '--format', 'jsonl',
+                     '--output', output] + args) == 0
+        with open(output) as file:
+            assert [json.loads(line) for line in file] == rows
+
+
+def test_module_entry_point(tmp_path):
+    grid = str(tmp_path / 'grid.bin')
+    _grid(grid)
+    root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    result = subprocess.run([sys.executable, '-m', 'power_python', grid, '--ticks', '3',
+                             '--engine', 'grid'], cwd=root, capture_output=True, text=True)
+    assert result.returncode == 0
+    assert result.stdout.splitlines()[0] == 'tick,remaining,stored'
+    assert len(result.stdout.splitlines()) == 4
@@ -0,0 +1,24 @@
+import pytest
+
+from ..power_load import PowerLoad
+from ..power_source import PowerSource
+from ..power_bank import PowerBank
+from ..scenario import load, save
+
+
+@pytest.mark.parametrize('name', ['grid.json', 'grid.bin'])
+def test_round_trip(tmp_path, name):
+    p = PowerSource(300)
+    b = PowerBank(150, 100, 3000)
+    p.connect_many([b, PowerLoad(100)])
+    b.connect(PowerLoad(80))
+    p.supply_power()
+    path = str(tmp_path / name)
+    save(path, [p, b])
+    scenario = load(path)
+    q, c, load_c, load_p = scenario.nodes
+    assert scenario.sources == [q, c]
+    assert q.output() == 300 and list(q._connections) == [c, load_p]
+    assert (c.input(), c.max_output(), c.capacity(), c.stored_power()) == (150, 100, 3000, 150)
+    assert list(c._connections) == [load_c] and load_c.input() == 80
+    assert [s.supply_power() for s in scenario.sources] == [p.supply_power(), b.supply_power()]
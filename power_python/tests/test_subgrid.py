@@ -0,0 +1,54 @@
+import pytest
+
+from ..grid_engine import GridEngine
+from ..power_source import _RECEIVERS, PowerSource
+from ..power_bank import PowerBank
+from ..power_load import PowerLoad
+from ..subgrid import SubGrid
+
+
+class CountingLoad(PowerLoad):
+    __slots__ = ()
+    calls = 0
+
+    def receive_power(self, watt_amount):
+        CountingLoad.calls += 1
+        return PowerLoad.receive_power(self, watt_amount)
+
+
+# Its outcome is known like the one of a plain load, so groups can skip it.
+_RECEIVERS[CountingLoad.receive_power] = False
+
+
+def test_subgrid():
+    loads = [CountingLoad(10) for _ in range(5)]
+    bank = PowerBank(50, 50, 1000)
+    inner = SubGrid(loads)
+    outer = SubGrid([inner, bank])
+    p = PowerSource(80)
+    p.connect(outer)
+    assert outer.input() == 100 and inner.parent() is outer
+    CountingLoad.calls = 0
+    p.supply_power()
+    assert p.efficiency(outer) == 80 and bank.stored_power() == 30
+    # The loads got their whole input, so they weren't even called.
+    assert CountingLoad.calls == 0
+    extra = PowerLoad(20)
+    assert inner.connect(extra) and outer.input() == 120
+    assert not inner.connect(outer) and not SubGrid().connect(inner)
+    assert inner.disconnect(extra) and outer.disconnect(inner) and outer.input() == 50
+    assert inner.parent() is None
+    with pytest.raises(ValueError):
+        GridEngine([p])
+
+
+def test_subgrid_calls_only_the_cutoff():
+    loads = [CountingLoad(1) for _ in range(1000)]
+    bank = PowerBank(100, 10, 1000)
+    group = SubGrid(loads[:500] + [bank] + loads[500:])
+    p = PowerSource(700)
+    p.connect(group)
+    CountingLoad.calls = 0
+    p.supply_power()
+    assert bank.stored_power() == 100 and CountingLoad.calls == 1
+    assert p.efficiency(group) == 63
@@ -0,0 +1,65 @@
+import csv
+
+from ..power_load import PowerLoad
+from ..power_source import PowerSource
+from ..power_bank import PowerBank
+from ..sweep import evaluate, main
+
+
+def test_evaluate_matches_supply_power():
+    supply = [(30, 200), (50, 0)]
+    row = evaluate((150, 100, 2000), 80, supply, days=3)
+    bank = PowerBank(150, 100, 2000)
+    bank.connect(PowerLoad(80))
+    day, night = PowerSource(200), PowerSource(0)
+    day.connect(bank)
+    night.connect(bank)
+    for _ in range(3):
+        for source, seconds in ((day, 30), (night, 50)):
+            for _ in range(seconds):
+                source.supply_power()
+                bank.supply_power()
+    assert row[-1] == bank.stored_power() and row[5] == 80 * 240
+
+
+def test_sweep_resumes(tmp_path):
+    path = str(tmp_path / 'sweep.csv')
+    args = ['--inputs', '100:300:100', '--outputs', '50,100', '--capacities', '1000',
+            '--load', '80', '--supply', '43200:300,43200:0', '--output', path, '--workers', '2']
+    assert main(args) == 0
+    main(args[:5] + ['1000,5000'] + args[6:])
+    with open(path, newline='') as file:
+        rows = list(csv.DictReader(file))
+    assert len(rows) == 12
+    assert len({(row['power_input'], row['power_output'], row['capacity']) for row in rows}) == 12
+
+
+def test_sweep_resumes_after_partial_row(tmp_path):
+    path = str(tmp_path / 'sweep.csv')
+    args = ['--inputs', '100,200', '--outputs', '50', '--capacities', '1000', '--load', '80',
+            '--supply', '43200:300,43200:0', '--output', path, '--workers', '1']
+    main(args)
+    with open(path) as file:
+        content = file.read()
+    # Interrupted while writing the last row.
+    with open(path, 'w', newline='') as file:
+        file.write(content[:content.rindex('200,')] + '200,5')
+    assert main(args) == 0
+    with open(path, newline='') as file:
+        rows = list(csv.DictReader(file))
+    assert [row['power_input'] for row in rows] == ['100', '200'] and rows[1]['stored_power']
+
+
+def test_sweep_resumes_after_empty_file(tmp_path):
+    path = str(tmp_path / 'sweep.csv')
+    args = ['--inputs', '100,200', '--outputs', '50', '--capacities', '1000', '--load', '80',
+            '--supply', '43200:300,43200:0', '--output', path, '--workers', '1']
+    # Interrupted before anything was flushed, or while writing the header.
+    for content in ('', 'power_input,power'):
+        with open(path, 'w', newline='') as file:
+            file.write(content)
+        assert main(args) == 0
+        assert main(args) == 0
+        with open(path, newline='') as file:
+            rows = list(csv.DictReader(file))
+        assert [row['power_input'] for row in rows] == ['100', '200']